@@ -0,0 +1,188 @@
+"""
+Response cache for read endpoints.
+
+Entries are keyed by path + sorted query parameters (+ a digest of the
+body for POST reads) and tagged with the
+dataset versions (see app.db.versions) read before the query ran. An
+entry is served only while those versions are unchanged, so a dashboard
+polling every minute hits Postgres once per ingestion run instead of
+once per poll. Eviction is LRU with a TTL, within both an entry count and
+a byte budget for the bodies (a body over a tenth of the budget is served
+but not kept); clients get an ETag and a 304 for If-None-Match.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from fastapi import APIRouter, Request, Response
+from sqlalchemy import text
+
+from app.config.settings import settings
+from app.db.connection import async_engine
+
+
+router = APIRouter(prefix="/v2/cache", tags=["Cache"])
+
+
+@dataclass
+class CachedResponse:
+    version: tuple
+    expires_at: float
+    etag: str
+    body: bytes
+    headers: dict
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int, ttl: float, max_bytes: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.too_large = 0
+
+    def _remove(self, key: tuple) -> None:
+        self.bytes -= len(self._entries.pop(key).body)
+
+    def get(self, key: tuple, version: tuple) -> CachedResponse | None:
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if entry.version != version or entry.expires_at < time.monotonic():
+            self._remove(key)
+            self.invalidations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: tuple, entry: CachedResponse) -> None:
+        if key in self._entries:
+            self._remove(key)
+
+        if len(entry.body) > self.max_bytes // 10:
+            self.too_large += 1
+            return
+
+        self._entries[key] = entry
+        self.bytes += len(entry.body)
+
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "too_large": self.too_large,
+        }
+
+
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl=settings.RESPONSE_CACHE_TTL,
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+)
+
+# dataset_versions is re-read at most every RESPONSE_CACHE_VERSION_TTL seconds
+_versions: dict[str, int] = {}
+_versions_read_at = float("-inf")
+
+
+async def dataset_versions() -> dict[str, int]:
+    global _versions, _versions_read_at
+
+    if time.monotonic() - _versions_read_at > settings.RESPONSE_CACHE_VERSION_TTL:
+        async with async_engine.connect() as conn:
+            rows = (await conn.execute(
+                text("SELECT dataset_id, version FROM dataset_versions")
+            )).fetchall()
+        _versions = {r[0]: r[1] for r in rows}
+        _versions_read_at = time.monotonic()
+
+    return _versions
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    return etag in request.headers.get("if-none-match", "")
+
+
+def _respond(request: Request, entry: CachedResponse, status: str) -> Response:
+    headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": "no-cache", "X-Cache": status}
+
+    if _not_modified(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(entry.body, headers=headers)
+
+
+async def cached_response(
+    request: Request, dataset_ids: list[str] | None, build, body: bytes | None = None
+) -> Response:
+    """
+    Serve `build()` (an awaitable returning a Response) through the cache.
+    `dataset_ids` are the datasets the response depends on; None means
+    any dataset. POST endpoints pass the request `body`, which becomes
+    part of the key.
+    """
+    if response_cache.ttl <= 0:
+        return await build()
+
+    # Versions are read before the query, so a concurrent ingest can only
+    # make the entry look older than it is, never newer
+    versions = await dataset_versions()
+    if dataset_ids is None:
+        version = tuple(sorted(versions.items()))
+    else:
+        version = tuple(versions.get(d, 0) for d in dataset_ids)
+
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+    if body is not None:
+        key += (hashlib.blake2b(body, digest_size=16).hexdigest(),)
+
+    entry = response_cache.get(key, version)
+    if entry is not None:
+        return _respond(request, entry, "HIT")
+
+    response = await build()
+    if response.status_code != 200:
+        return response
+
+    body = bytes(response.body)
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    entry = CachedResponse(
+        version=version,
+        expires_at=time.monotonic() + response_cache.ttl,
+        etag='"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"',
+        body=body,
+        headers=headers,
+    )
+    response_cache.put(key, entry)
+
+    return _respond(request, entry, "MISS")
+
+
+@router.get("/stats")
+def cache_stats():
+    return response_cache.stats()
@@ -1,87 +1,104 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy import text
-from app.db.connection import engine
+from app.db.connection import async_engine
+from app.archive.raw_events import fetch_raw_page_async
+from app.api.v2.cache import cached_response
+from app.api.v2.formats import json_passthrough
+from app.api.v2.pagination import NEXT_CURSOR_HEADER, RAW_EVENTS, decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/v2/discovery", tags=["Discovery"])
 
 
 @router.get("/datasets")
-def list_datasets():
-    with engine.connect() as conn:
-        rows = conn.execute(
-            text("SELECT DISTINCT dataset_id FROM raw_events ORDER BY dataset_id")
-        ).fetchall()
-    return [r[0] for r in rows]
+async def list_datasets(request: Request, detail: bool = False):
+    """
+    Dataset ids from the registry (ingestion keeps it current); with
+    detail=true, also ingest times and row/series/field counts.
+    """
+    async def build():
+        async with async_engine.connect() as conn:
+            rows = (await conn.execute(
+                text("""
+                    SELECT dataset_id, source, first_ingested_at, last_ingested_at,
+                           raw_event_count, series_count, field_count
+                    FROM dataset_registry
+                    ORDER BY dataset_id
+                """)
+            )).mappings().fetchall()
+
+        if not detail:
+            return JSONResponse([r["dataset_id"] for r in rows])
+
+        return JSONResponse(jsonable_encoder([dict(r) for r in rows]))
+
+    return await cached_response(request, None, build)
 
 
 @router.get("/fields")
-def list_fields(dataset_id: str):
-    with engine.connect() as conn:
-        rows = conn.execute(
-            text("""
-                SELECT field_name, inferred_type, nullable, example_value
-                FROM field_catalog
-                WHERE dataset_id = :dataset_id
-                ORDER BY field_name
-            """),
-            {"dataset_id": dataset_id}
-        ).fetchall()
-
-    return [
-        {
-            "field": r[0],
-            "type": r[1],
-            "nullable": r[2],
-            "example": r[3],
-        }
-        for r in rows
-    ]
+async def list_fields(request: Request, dataset_id: str):
+    async def build():
+        async with async_engine.connect() as conn:
+            rows = (await conn.execute(
+                text("""
+                    SELECT field_name, inferred_type, nullable, example_value
+                    FROM field_catalog
+                    WHERE dataset_id = :dataset_id
+                    ORDER BY field_name
+                """),
+                {"dataset_id": dataset_id}
+            )).fetchall()
+
+        return JSONResponse([
+            {
+                "field": r[0],
+                "type": r[1],
+                "nullable": r[2],
+                "example": r[3],
+            }
+            for r in rows
+        ])
+
+    return await cached_response(request, [dataset_id], build)
 
 
 @router.get("/sample")
-def sample_data(dataset_id: str, limit: int = Query(5, le=50)):
-    with engine.connect() as conn:
-        rows = conn.execute(
-            text("""
-                SELECT raw_payload
-                FROM raw_events
-                WHERE dataset_id = :dataset_id
-                ORDER BY ingested_at DESC
-                LIMIT :limit
-            """),
-            {"dataset_id": dataset_id, "limit": limit}
-        ).fetchall()
+async def sample_data(request: Request, dataset_id: str, limit: int = Query(5, le=50)):
+    async def build():
+        async with async_engine.connect() as conn:
+            payloads, _ = await fetch_raw_page_async(conn, dataset_id, limit, as_text=True)
+        return json_passthrough(payloads)
 
-    return [r[0] for r in rows]
+    return await cached_response(request, [dataset_id], build)
 
 
 
 @router.get("/raw")
-def raw_preview(
+async def raw_preview(
+    request: Request,
     dataset_id: str,
     limit: int = Query(20, ge=1, le=500),
     site_id: int | None = None,
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
 ):
     """
     Return raw payload with optional filters (still zero-loss).
     Filters apply to JSON keys using PostgreSQL JSONB operators.
+    Archived events are included once the hot rows run out.
     """
-    where = ["dataset_id = :dataset_id"]
-    params = {"dataset_id": dataset_id, "limit": limit}
-
-    if site_id is not None:
-        where.append("(raw_payload ->> 'siteId')::int = :site_id")
-        params["site_id"] = site_id
-
-    sql = f"""
-        SELECT raw_payload
-        FROM raw_events
-        WHERE {' AND '.join(where)}
-        ORDER BY ingested_at DESC
-        LIMIT :limit
-    """
+    before = decode_cursor(cursor, RAW_EVENTS) if cursor else None
+
+    async def build():
+        async with async_engine.connect() as conn:
+            payloads, last = await fetch_raw_page_async(
+                conn, dataset_id, limit, site_id=site_id, before=before, as_text=True
+            )
+
+        headers = {}
+        if last is not None:
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(RAW_EVENTS, *last)
 
-    with engine.connect() as conn:
-        rows = conn.execute(text(sql), params).fetchall()
+        return json_passthrough(payloads, headers=headers)
 
-    return [r[0] for r in rows]
\ No newline at end of file
+    return await cached_response(request, [dataset_id], build)
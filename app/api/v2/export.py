@@ -1,62 +1,212 @@
 from fastapi import APIRouter, Query
-from fastapi.responses import JSONResponse
-from sqlalchemy import text
-from app.db.connection import engine
+from app.db.connection import async_engine
+from app.archive.raw_events import fetch_raw_page_async, iter_raw_payloads
+from app.api.v2.formats import json_passthrough
+from app.api.v2.pagination import NEXT_CURSOR_HEADER, RAW_EVENTS, decode_cursor, encode_cursor
+from app.utils.logger import logger
 from fastapi.responses import StreamingResponse
-import pandas as pd
+from sqlalchemy import text
+import csv
 import io
+import json
+import zlib
+import zstandard
 
 
 router = APIRouter(prefix="/v2/export", tags=["Export"])
 
+# Rows encoded per chunk handed to the response
+CHUNK_ROWS = 1000
+
+COMPRESSION = {
+    # name: (media type, file suffix)
+    "gzip": ("application/gzip", ".gz"),
+    "zstd": ("application/zstd", ".zst"),
+}
+
+
+async def _export_page(dataset_id: str, limit: int, cursor: str | None, as_text: bool = False):
+    before = decode_cursor(cursor, RAW_EVENTS) if cursor else None
+
+    async with async_engine.connect() as conn:
+        data, last = await fetch_raw_page_async(
+            conn, dataset_id, limit, before=before, as_text=as_text
+        )
+
+    headers = {}
+    if last is not None:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(RAW_EVENTS, *last)
+
+    return data, headers
+
 
 @router.get("/raw/json")
-def export_raw_json(
+async def export_raw_json(
     dataset_id: str,
     limit: int = Query(1000, ge=1, le=50000),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
 ):
-    with engine.connect() as conn:
-        rows = conn.execute(
+    data, headers = await _export_page(dataset_id, limit, cursor, as_text=True)
+    return json_passthrough(data, headers=headers)
+
+
+# ---------------- STREAMING EXPORTS ----------------
+
+async def _chunks(items, size: int = CHUNK_ROWS):
+    chunk = []
+    async for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _flatten(payload: dict, prefix: str = "") -> dict:
+    """
+    Nested objects become dotted columns after the plain ones (as
+    pd.json_normalize does); lists are written as JSON.
+    """
+    flat = {}
+    nested = {}
+    for key, value in payload.items():
+        if isinstance(value, dict):
+            nested.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, list):
+            flat[f"{prefix}{key}"] = json.dumps(value)
+        else:
+            flat[f"{prefix}{key}"] = value
+    flat.update(nested)
+    return flat
+
+
+async def _ndjson_chunks(payloads):
+    async for chunk in _chunks(payloads):
+        yield ("\n".join(chunk) + "\n").encode()
+
+
+async def _csv_fieldnames(dataset_id: str, rows: list[dict]) -> list[str]:
+    """
+    The first chunk's keys, then the dataset's other catalogued fields
+    (field_catalog, kept current by discover_fields), in discovery order.
+    """
+    async with async_engine.connect() as conn:
+        catalog = (await conn.execute(
             text("""
-                SELECT raw_payload
-                FROM raw_events
+                SELECT field_name
+                FROM field_catalog
                 WHERE dataset_id = :dataset_id
-                ORDER BY ingested_at DESC
-                LIMIT :limit
+                ORDER BY first_seen_at, field_name
             """),
-            {"dataset_id": dataset_id, "limit": limit}
-        ).fetchall()
+            {"dataset_id": dataset_id},
+        )).scalars().all()
 
-    data = [r[0] for r in rows]
-    return JSONResponse(content=data)
+    fieldnames = dict.fromkeys(k for row in rows for k in row)
+    for field in catalog:
+        # A nested field is already covered by its dotted columns
+        if field not in fieldnames and not any(k.startswith(f"{field}.") for k in fieldnames):
+            fieldnames[field] = None
+    return list(fieldnames)
 
 
+async def _csv_chunks(payloads, dataset_id: str):
+    """
+    The header is fixed before the first row is sent (see _csv_fieldnames);
+    keys outside it have no column and are logged once.
+    """
+    fieldnames = None
+    dropped = set()
 
-@router.get("/raw/csv")
-def export_raw_csv(
+    async for chunk in _chunks(payloads):
+        rows = [_flatten(p) for p in chunk]
+        header = fieldnames is None
+        if header:
+            fieldnames = await _csv_fieldnames(dataset_id, rows)
+            known = set(fieldnames)
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames, extrasaction="ignore", lineterminator="\n")
+        if header:
+            writer.writeheader()
+
+        for row in rows:
+            dropped |= row.keys() - known
+            writer.writerow(row)
+
+        yield buffer.getvalue().encode()
+
+    if dropped:
+        logger.warning(f"CSV export {dataset_id}: columns not in header dropped: {sorted(dropped)}")
+
+
+async def _compress(chunks, compression: str | None):
+    if compression is None:
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    if compression == "gzip":
+        compressor = zlib.compressobj(wbits=31)    # gzip container
+    else:
+        compressor = zstandard.ZstdCompressor().compressobj()
+
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _stream_response(chunks, media_type: str, filename: str, compression: str | None):
+    if compression is not None:
+        media_type, suffix = COMPRESSION[compression]
+        filename += suffix
+
+    return StreamingResponse(
+        _compress(chunks, compression),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+@router.get("/raw/ndjson")
+async def export_raw_ndjson(
     dataset_id: str,
-    limit: int = Query(1000, ge=1, le=50000),
+    limit: int | None = Query(None, ge=1, description="default: the whole dataset"),
+    cursor: str | None = Query(None, description="start after this position"),
+    compression: str | None = Query(None, pattern="^(gzip|zstd)$"),
 ):
-    with engine.connect() as conn:
-        rows = conn.execute(
-            text("""
-                SELECT raw_payload
-                FROM raw_events
-                WHERE dataset_id = :dataset_id
-                ORDER BY ingested_at DESC
-                LIMIT :limit
-            """),
-            {"dataset_id": dataset_id, "limit": limit}
-        ).fetchall()
+    """
+    Stream raw payloads newest first, one JSON document per line.
+    """
+    before = decode_cursor(cursor, RAW_EVENTS) if cursor else None
+    payloads = iter_raw_payloads(dataset_id, before=before, limit=limit, as_text=True)
 
-    df = pd.json_normalize([r[0] for r in rows])
+    return _stream_response(
+        _ndjson_chunks(payloads),
+        "application/x-ndjson",
+        f"{dataset_id}_raw.ndjson",
+        compression,
+    )
 
-    buffer = io.StringIO()
-    df.to_csv(buffer, index=False)
-    buffer.seek(0)
 
-    return StreamingResponse(
-        buffer,
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={dataset_id}_raw.csv"},
+@router.get("/raw/csv")
+async def export_raw_csv(
+    dataset_id: str,
+    limit: int | None = Query(None, ge=1, description="default: the whole dataset"),
+    cursor: str | None = Query(None, description="start after this position"),
+    compression: str | None = Query(None, pattern="^(gzip|zstd)$"),
+):
+    """
+    Stream raw payloads newest first as CSV, nested fields flattened.
+    """
+    before = decode_cursor(cursor, RAW_EVENTS) if cursor else None
+    payloads = iter_raw_payloads(dataset_id, before=before, limit=limit)
+
+    return _stream_response(
+        _csv_chunks(payloads, dataset_id),
+        "text/csv",
+        f"{dataset_id}_raw.csv",
+        compression,
     )
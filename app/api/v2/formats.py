@@ -0,0 +1,134 @@
+"""
+Columnar response formats for /v2/data.
+
+Rows are transposed straight from the DB cursor into column lists (no
+per-row Pydantic models) and rendered as:
+
+- compact : JSON, one object per series with timestamps[] / values[] arrays
+- arrow   : Arrow IPC stream of a long table (one row per observation)
+- parquet : the same table as a Parquet file
+
+json_passthrough() forwards JSON already rendered by Postgres as-is.
+"""
+import io
+import json
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi.responses import Response
+
+
+FORMATS = ("json", "compact", "arrow", "parquet")
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+# Column order of the /v2/data rows
+ROW_FIELDS = (
+    "series_id", "dataset_id", "description", "unit", "frequency",
+    "observation_time", "value", "quality_flag", "raw_payload",
+)
+
+
+def _columns(rows) -> dict[str, tuple]:
+    if not rows:
+        return {name: () for name in ROW_FIELDS}
+    return dict(zip(ROW_FIELDS, zip(*rows)))
+
+
+def to_compact_json(rows, include_raw: bool = False) -> bytes:
+    cols = _columns(rows)
+    series = {}
+
+    for i, sid in enumerate(cols["series_id"]):
+        s = series.get(sid)
+        if s is None:
+            s = series[sid] = {
+                "series_id": sid,
+                "dataset_id": cols["dataset_id"][i],
+                "description": cols["description"][i],
+                "unit": cols["unit"][i],
+                "frequency": cols["frequency"][i],
+                "timestamps": [],
+                "values": [],
+                "quality_flags": [],
+            }
+            if include_raw:
+                s["raw_payloads"] = []
+
+        s["timestamps"].append(cols["observation_time"][i].isoformat())
+        s["values"].append(cols["value"][i])
+        s["quality_flags"].append(cols["quality_flag"][i])
+        if include_raw:
+            s["raw_payloads"].append(cols["raw_payload"][i])
+
+    return json.dumps(list(series.values()), separators=(",", ":")).encode()
+
+
+def to_arrow_table(rows, include_raw: bool = False) -> pa.Table:
+    cols = _columns(rows)
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+
+    arrays = {
+        "series_id": pa.array(cols["series_id"], type=pa.string()).dictionary_encode(),
+        "observation_time": pa.array(cols["observation_time"], type=pa.timestamp("us", tz="UTC")),
+        "value": pa.array(cols["value"], type=pa.float64()),
+        "quality_flag": pa.array(cols["quality_flag"], type=pa.string()).dictionary_encode(),
+        "dataset_id": pa.array(cols["dataset_id"], type=pa.string()).dictionary_encode(),
+        "unit": pa.array(cols["unit"], type=pa.string()).dictionary_encode(),
+        "frequency": pa.array(cols["frequency"], type=pa.string()).dictionary_encode(),
+        "description": pa.array(cols["description"], type=pa.string()).dictionary_encode(),
+    }
+
+    if include_raw:
+        arrays["raw_payload"] = pa.array(
+            [json.dumps(p) if p is not None else None for p in cols["raw_payload"]],
+            type=pa.string(),
+        )
+
+    table = pa.table(arrays)
+    return table.cast(pa.schema([
+        pa.field(f.name, dictionary) if pa.types.is_dictionary(f.type) else f
+        for f in table.schema
+    ]))
+
+
+def to_arrow_ipc(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def to_parquet(table: pa.Table) -> bytes:
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression="zstd")
+    return buffer.getvalue()
+
+
+def render_rows(rows, fmt: str, include_raw: bool = False, headers: dict | None = None) -> Response:
+    """
+    Response for one of the non-default formats.
+    """
+    if fmt == "compact":
+        return Response(to_compact_json(rows, include_raw), media_type="application/json", headers=headers)
+
+    table = to_arrow_table(rows, include_raw)
+
+    if fmt == "arrow":
+        return Response(to_arrow_ipc(table), media_type=ARROW_MEDIA_TYPE, headers=headers)
+
+    if fmt == "parquet":
+        return Response(to_parquet(table), media_type=PARQUET_MEDIA_TYPE, headers=headers)
+
+    raise ValueError(f"Unsupported format: {fmt}")
+
+
+def json_passthrough(body: str | list[str], headers: dict | None = None) -> Response:
+    """
+    JSON response from text rendered by Postgres: either a complete
+    document or a list of JSON values joined into an array.
+    """
+    if not isinstance(body, str):
+        body = "[" + ",".join(body) + "]"
+    return Response(body.encode(), media_type="application/json", headers=headers)
@@ -1,12 +1,18 @@
 from fastapi import APIRouter
 from app.ingestion.gie.service import ingest_gie
 from app.ingestion.gie.constants import DATASET_AGSI, DATASET_ALSI, SOURCE_AGSI, SOURCE_ALSI
-from fastapi import APIRouter, Query
+from datetime import date
+from fastapi import APIRouter, HTTPException, Query, Request
 from sqlalchemy import text
-from app.db.connection import engine
+from app.db.connection import async_engine
+from app.api.v2.formats import json_passthrough
+from app.api.v2.cache import cached_response
 
 router = APIRouter(prefix="/v2/gie", tags=["GIE"])
 
+# Version key bumped by ingest_gie() for each energy.daily source
+SOURCE_DATASETS = {SOURCE_AGSI: DATASET_AGSI, SOURCE_ALSI: DATASET_ALSI}
+
 @router.post("/agsi")
 def ingest_agsi(country: str | None = None):
     ingest_gie(DATASET_AGSI, SOURCE_AGSI, country)
@@ -18,8 +24,16 @@ def ingest_alsi(country: str | None = None):
     ingest_gie(DATASET_ALSI, SOURCE_ALSI, country)
     return {"status": "completed", "dataset": "ALSI", "country": country}
 
+def _parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid date: {value}. Use YYYY-MM-DD")
+
+
 @router.get("/data")
-def get_gie_data(
+async def get_gie_data(
+    request: Request,
     source: str,
     country: str | None = None,
     variable: str | None = None,
@@ -41,31 +55,41 @@ def get_gie_data(
 
     if start_date:
         where.append("d.value_date >= :start_date")
-        params["start_date"] = start_date
+        params["start_date"] = _parse_date(start_date)
 
     if end_date:
         where.append("d.value_date <= :end_date")
-        params["end_date"] = end_date
+        params["end_date"] = _parse_date(end_date)
 
+    # Postgres renders the response; the bytes are forwarded as-is
     sql = f"""
-        SELECT d.value_date, d.value, s.variable, a.name AS country
-        FROM energy.daily d
-        JOIN meta.series s ON d.series_id = s.series_id
-        JOIN meta.assets a ON d.asset_id = a.asset_id
-        WHERE {' AND '.join(where)}
-        ORDER BY d.value_date DESC
-        LIMIT :limit
+        SELECT COALESCE(
+            json_agg(
+                json_build_object(
+                    'date', t.value_date,
+                    'value', t.value::float8,
+                    'variable', t.variable,
+                    'country', t.country
+                )
+                ORDER BY t.value_date DESC
+            ),
+            '[]'
+        )::text
+        FROM (
+            SELECT d.value_date, d.value, s.variable, a.name AS country
+            FROM energy.daily d
+            JOIN meta.series s ON d.series_id = s.series_id
+            JOIN meta.assets a ON d.asset_id = a.asset_id
+            WHERE {' AND '.join(where)}
+            ORDER BY d.value_date DESC
+            LIMIT :limit
+        ) t
     """
 
-    with engine.connect() as conn:
-        rows = conn.execute(text(sql), params).fetchall()
-
-    return [
-        {
-            "date": r[0],
-            "value": float(r[1]) if r[1] is not None else None,
-            "variable": r[2],
-            "country": r[3],
-        }
-        for r in rows
-    ]
\ No newline at end of file
+    async def build():
+        async with async_engine.connect() as conn:
+            body = (await conn.execute(text(sql), params)).scalar()
+        return json_passthrough(body)
+
+    dataset = SOURCE_DATASETS.get(source)
+    return await cached_response(request, [dataset] if dataset else None, build)
@@ -0,0 +1,32 @@
+from datetime import datetime, timezone
+import asyncio
+
+from fastapi import APIRouter, Query
+from fastapi.responses import Response
+
+from app.db.latest import LatestSnapshot, ensure_latest, snapshot_path
+
+
+router = APIRouter(prefix="/v2", tags=["Latest"])
+
+# Re-mapped by each worker when ingestion publishes a new snapshot
+snapshot = LatestSnapshot(snapshot_path())
+
+
+@router.get("/latest")
+async def get_latest(
+    series_id: list[str] | None = Query(None, description="Repeat for several series; all when omitted"),
+    dataset_id: str | None = None,
+):
+    """
+    Last observation of every series (or the selected ones), from the
+    snapshot ingestion keeps up to date.
+    """
+    if not snapshot.refresh():
+        await asyncio.to_thread(ensure_latest)
+        snapshot.refresh()
+
+    headers = {
+        "X-Snapshot-Time": datetime.fromtimestamp(snapshot.mtime, timezone.utc).isoformat(),
+    }
+    return Response(snapshot.select(series_id, dataset_id), media_type="application/json", headers=headers)
@@ -0,0 +1,29 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+OBSERVATIONS = "obs"     # (observation_time, series_id) ascending
+RAW_EVENTS = "raw"       # (ingested_at, id) descending
+
+
+def encode_cursor(kind: str, ts: datetime, key: str) -> str:
+    """
+    Opaque keyset cursor pointing at the last row of a page.
+    """
+    raw = json.dumps([kind, ts.isoformat(), str(key)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, kind: str) -> tuple[datetime, str]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        token_kind, ts, key = json.loads(base64.urlsafe_b64decode(padded))
+        if token_kind != kind:
+            raise ValueError(token_kind)
+        return datetime.fromisoformat(ts), key
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -1,6 +1,7 @@
+from datetime import datetime
 from sqlalchemy import text
 
-DATA_QUERY = text("""
+DATA_SELECT = """
 SELECT
     m.series_id,
     m.dataset_id,
@@ -9,18 +10,87 @@ SELECT
     m.frequency,
     d.observation_time,
     d.value,
-    d.quality_flag,
+    q.flag AS quality_flag,
     d.raw_payload
 FROM meta_series m
 JOIN data_observations d
-  ON m.series_id = d.series_id
-WHERE (:series_id IS NULL OR m.series_id = :series_id)
-  AND (:dataset_id IS NULL OR m.dataset_id = :dataset_id)
-  AND (:start IS NULL OR d.observation_time >= :start)
-  AND (:end IS NULL OR d.observation_time <= :end)
-  AND (:quality_flag IS NULL OR d.quality_flag = :quality_flag)
-  AND (:min_value IS NULL OR d.value >= :min_value)
-  AND (:max_value IS NULL OR d.value <= :max_value)
-ORDER BY d.observation_time
-LIMIT :limit OFFSET :offset
-""")
+  ON m.series_key = d.series_key
+LEFT JOIN quality_flags q
+  ON q.flag_id = d.quality_flag_id
+"""
+
+
+def build_data_query(
+    series_id: str | None = None,
+    dataset_id: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    quality_flag: str | None = None,
+    min_value: float | None = None,
+    max_value: float | None = None,
+    after: tuple | None = None,
+    limit: int = 1000,
+    offset: int = 0,
+):
+    """
+    Compose the /v2/data query from only the filters actually supplied.
+
+    Every combination gets its own plain predicate list (no
+    ":x IS NULL OR ..." branches), so the planner can use the
+    (series_key, observation_time) primary key and prune partitions.
+    Values are still bound as parameters.
+
+    `after` is a keyset position (observation_time, series_id): the page
+    starts right after it, so deep pages cost the same as the first one.
+    """
+    where = []
+    params = {"limit": limit, "offset": offset}
+
+    if series_id is not None:
+        where.append("m.series_id = :series_id")
+        params["series_id"] = series_id
+
+    if dataset_id is not None:
+        where.append("m.dataset_id = :dataset_id")
+        params["dataset_id"] = dataset_id
+
+    if start is not None:
+        where.append("d.observation_time >= :start")
+        params["start"] = start
+
+    if end is not None:
+        where.append("d.observation_time <= :end")
+        params["end"] = end
+
+    if quality_flag is not None:
+        # Resolve the flag once instead of filtering the joined text column
+        where.append(
+            "d.quality_flag_id = "
+            "(SELECT flag_id FROM quality_flags WHERE flag = :quality_flag)"
+        )
+        params["quality_flag"] = quality_flag
+
+    if min_value is not None:
+        where.append("d.value >= :min_value")
+        params["min_value"] = min_value
+
+    if max_value is not None:
+        where.append("d.value <= :max_value")
+        params["max_value"] = max_value
+
+    if after is not None:
+        # The plain time bound keeps the index range scan and pruning
+        where.append("d.observation_time >= :after_time")
+        where.append(
+            '(d.observation_time, m.series_id COLLATE "C") > (:after_time, :after_series)'
+        )
+        params["after_time"], params["after_series"] = after
+
+    sql = DATA_SELECT
+    if where:
+        sql += "WHERE " + "\n  AND ".join(where) + "\n"
+    # Byte-wise tie-break so keyset order matches the cold tier (DuckDB)
+    sql += 'ORDER BY d.observation_time, m.series_id COLLATE "C"\n'
+    sql += "LIMIT :limit OFFSET :offset\n"
+
+    return text(sql), params
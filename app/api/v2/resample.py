@@ -0,0 +1,384 @@
+"""
+Server-side resampling for /v2/data/resample.
+
+- bucket : time buckets aggregated in SQL (mean/min/max/sum/first/last/count)
+           at fixed widths (15min, 1h, 1d, ...) or UK gas days
+- lttb   : Largest-Triangle-Three-Buckets, keeps `points` raw observations
+           per series that preserve the chart's shape
+
+Fixed buckets are aligned to 2000-01-01 UTC (Postgres date_bin). A gas
+day runs 05:00-05:00 Europe/London, so it is 23 or 25 hours long on
+clock-change days; its bucket is labelled by its UTC start.
+
+Ranges reaching the Parquet cold tier are bucketed in pandas up to the
+first bucket boundary after the cold tier ends (hot rows win on
+duplicates, as in stitch_long_history); the rest is bucketed by Postgres,
+from the hourly / gas-day rollups (app.db.rollups) when the interval
+allows it.
+"""
+import re
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app.archive.observations import read_cold_history
+from app.db.rollups import GAS_DAY_TZ, ROLLUP_AGGREGATES, ROLLUPS, gas_day_start_sql
+
+
+GAS_DAY = "gasday"
+GAS_DAY_START = timedelta(hours=5)
+
+# date_bin origin (a Saturday, so 1w buckets start on Saturdays)
+ORIGIN = datetime(2000, 1, 1)
+
+AGGREGATES = ("mean", "min", "max", "sum", "first", "last", "count")
+
+_AGG_SQL = {
+    "mean": "avg(d.value)",
+    "min": "min(d.value)",
+    "max": "max(d.value)",
+    "sum": "sum(d.value)",
+    "first": "(array_agg(d.value ORDER BY d.observation_time))[1]",
+    "last": "(array_agg(d.value ORDER BY d.observation_time DESC))[1]",
+    "count": "count(*)",
+}
+
+_INTERVAL_RE = re.compile(r"^(\d+)(min|h|d|w)$")
+_UNITS = {"min": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+# Re-aggregation of rollup rows (app.db.rollups)
+_ROLLUP_AGG_SQL = {
+    "mean": "sum(g.total) / sum(g.n)",
+    "min": "min(g.min_value)",
+    "max": "max(g.max_value)",
+    "sum": "sum(g.total)",
+    "first": "(array_agg(g.first_value ORDER BY g.first_time))[1]",
+    "last": "(array_agg(g.last_value ORDER BY g.last_time DESC))[1]",
+    "count": "sum(g.n)::bigint",
+}
+
+HOUR = timedelta(hours=1)
+
+
+def parse_interval(value: str) -> timedelta | str:
+    """
+    '15min', '1h', '1d', '1w', ... or 'gasday'.
+    """
+    if value == GAS_DAY:
+        return GAS_DAY
+
+    match = _INTERVAL_RE.match(value)
+    width = timedelta(**{_UNITS[match.group(2)]: int(match.group(1))}) if match else None
+    if not width:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid interval: {value}. Use e.g. 15min, 1h, 1d, 1w or {GAS_DAY}",
+        )
+    return width
+
+
+def parse_aggregates(values: list[str]) -> list[str]:
+    unknown = [a for a in values if a not in AGGREGATES]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid agg: {', '.join(unknown)}. Use {', '.join(AGGREGATES)}",
+        )
+    return list(dict.fromkeys(values))
+
+
+# ---------------- Bucket boundaries ----------------
+
+def gas_day_start(day: date) -> datetime:
+    """UTC start (naive) of a gas day."""
+    local = pd.Timestamp(datetime.combine(day, time(5))).tz_localize(GAS_DAY_TZ)
+    return local.tz_convert("UTC").tz_localize(None).to_pydatetime()
+
+
+def _gas_days(times: pd.Series) -> pd.Series:
+    # Wall-clock arithmetic: on clock-change days 05:00 local is not
+    # 5 hours after local midnight
+    local = times.dt.tz_localize("UTC").dt.tz_convert(GAS_DAY_TZ).dt.tz_localize(None)
+    return (local - GAS_DAY_START).dt.normalize()
+
+
+def bucket_starts(times: pd.Series, interval) -> pd.Series:
+    """pandas counterpart of bucket_query() for naive UTC timestamps."""
+    if interval == GAS_DAY:
+        starts = (_gas_days(times) + GAS_DAY_START).dt.tz_localize(GAS_DAY_TZ)
+        return starts.dt.tz_convert("UTC").dt.tz_localize(None)
+
+    width = pd.Timedelta(interval)
+    return ORIGIN + ((times - ORIGIN) // width) * width
+
+
+def previous_boundary(ts: datetime, interval) -> datetime:
+    """Start of the bucket containing ts."""
+    if interval == GAS_DAY:
+        return gas_day_start(_gas_days(pd.Series([pd.Timestamp(ts)])).iloc[0].date())
+
+    return ORIGIN + ((ts - ORIGIN) // interval) * interval
+
+
+def next_boundary(ts: datetime, interval) -> datetime:
+    """First bucket boundary at or after ts."""
+    start = previous_boundary(ts, interval)
+    if start == ts:
+        return start
+    if interval == GAS_DAY:
+        return gas_day_start(_gas_days(pd.Series([pd.Timestamp(ts)])).iloc[0].date() + timedelta(days=1))
+    return start + interval
+
+
+# ---------------- Bucketing ----------------
+
+def _range_where(start: datetime | None, end: datetime | None, series: bool = True) -> tuple[str, dict]:
+    where = ["m.series_id = ANY(:series_ids)"] if series else []
+    params = {}
+
+    if start is not None:
+        where.append("d.observation_time >= :start")
+        params["start"] = start
+
+    if end is not None:
+        where.append("d.observation_time < :end")
+        params["end"] = end
+
+    return " AND ".join(where), params
+
+
+def bucket_query(interval, aggregates: list[str], start=None, end=None) -> tuple:
+    """
+    Aggregates per (series_id, bucket) over start <= observation_time < end;
+    :series_ids is bound by the caller.
+    """
+    where, params = _range_where(start, end)
+
+    if interval == GAS_DAY:
+        bucket = gas_day_start_sql("d.observation_time")
+    else:
+        bucket = "date_bin(:width, d.observation_time, :origin)"
+        params.update(width=interval, origin=ORIGIN)
+
+    columns = ",\n".join(f"{_AGG_SQL[a]} AS {a}" for a in aggregates)
+
+    sql = f"""
+        SELECT m.series_id, {bucket} AS bucket,
+        {columns}
+        FROM meta_series m
+        JOIN data_observations d ON d.series_key = m.series_key
+        WHERE {where}
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+    """
+    return text(sql), params
+
+
+def rollup_query(interval, aggregates: list[str], start=None, end=None) -> tuple | None:
+    """
+    Same result as bucket_query() from the rollup tables: gas days from
+    the gas-day rollup, whole-hour widths from the hourly one. Rows before
+    the first / after the last whole rollup bucket in the range are rolled
+    up from raw rows on the fly. None when no rollup fits the interval.
+    """
+    if interval == GAS_DAY:
+        grain, rollup, target = GAS_DAY, ROLLUPS["gasday"], "g.bucket"
+    elif interval % HOUR == timedelta(0):
+        grain, rollup, target = HOUR, ROLLUPS["hourly"], "date_bin(:width, g.bucket, :origin)"
+    else:
+        return None
+
+    params = {}
+    where = ["m.series_id = ANY(:series_ids)"]
+    edges = []
+
+    lo = next_boundary(start, grain) if start is not None else None
+    hi = previous_boundary(end, grain) if end is not None else None
+    if lo is not None and hi is not None and lo >= hi:
+        return None
+
+    if lo is not None:
+        where.append("r.bucket >= :lo")
+        edges.append("(d.observation_time >= :start AND d.observation_time < :lo)")
+        params.update(start=start, lo=lo)
+    if hi is not None:
+        where.append("r.bucket < :hi")
+        edges.append("(d.observation_time >= :hi AND d.observation_time < :end)")
+        params.update(end=end, hi=hi)
+    if interval != GAS_DAY:
+        params.update(width=interval, origin=ORIGIN)
+
+    raw_edges = ""
+    if edges:
+        raw_edges = f"""
+            UNION ALL
+            SELECT m.series_id, {rollup.bucket("d.observation_time")}, {ROLLUP_AGGREGATES}
+            FROM meta_series m
+            JOIN data_observations d ON d.series_key = m.series_key
+            WHERE m.series_id = ANY(:series_ids)
+              AND ({' OR '.join(edges)})
+            GROUP BY 1, 2
+        """
+
+    columns = ",\n".join(f"{_ROLLUP_AGG_SQL[a]} AS {a}" for a in aggregates)
+
+    sql = f"""
+        WITH g (series_id, bucket, n, total, min_value, max_value,
+                first_time, first_value, last_time, last_value) AS (
+            SELECT m.series_id, r.bucket, r.n, r.total, r.min_value, r.max_value,
+                   r.first_time, r.first_value, r.last_time, r.last_value
+            FROM meta_series m
+            JOIN {rollup.table} r ON r.series_key = m.series_key
+            WHERE {' AND '.join(where)}
+            {raw_edges}
+        )
+        SELECT g.series_id, {target} AS bucket,
+        {columns}
+        FROM g
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+    """
+    return text(sql), params
+
+
+def bucket_frame(points: pd.DataFrame, interval, aggregates: list[str]) -> pd.DataFrame:
+    """
+    Same buckets as bucket_query() for (series_id, observation_time, value)
+    rows already in memory.
+    """
+    columns = ["series_id", "bucket", *aggregates]
+    if points.empty:
+        return pd.DataFrame(columns=columns)
+
+    points = points.sort_values(["series_id", "observation_time"])
+    points["bucket"] = bucket_starts(points["observation_time"], interval)
+
+    return (
+        points.groupby(["series_id", "bucket"])["value"]
+        .agg(aggregates)
+        .reset_index()[columns]
+    )
+
+
+# ---------------- Raw points ----------------
+
+def raw_points_query(start=None, end=None, limit: int | None = None) -> tuple:
+    """
+    Raw points over start <= observation_time < end; with `limit`, only the
+    first `limit` of each series (read off the primary key, so a long range
+    is not scanned). :series_ids is bound by the caller.
+    """
+    if limit is None:
+        where, params = _range_where(start, end)
+        sql = f"""
+            SELECT m.series_id, d.observation_time, d.value
+            FROM meta_series m
+            JOIN data_observations d ON d.series_key = m.series_key
+            WHERE {where}
+            ORDER BY m.series_id, d.observation_time
+        """
+        return text(sql), params
+
+    where, params = _range_where(start, end, series=False)
+    bounds = f" AND {where}" if where else ""
+    params["limit"] = limit
+    sql = f"""
+        SELECT m.series_id, d.observation_time, d.value
+        FROM meta_series m
+        CROSS JOIN LATERAL (
+            SELECT d.observation_time, d.value
+            FROM data_observations d
+            WHERE d.series_key = m.series_key{bounds}
+            ORDER BY d.observation_time
+            LIMIT :limit
+        ) d
+        WHERE m.series_id = ANY(:series_ids)
+        ORDER BY m.series_id, d.observation_time
+    """
+    return text(sql), params
+
+
+def points_frame(rows) -> pd.DataFrame:
+    """(series_id, observation_time, value) rows as typed columns."""
+    sids, times, values = zip(*rows) if rows else ((), (), ())
+    return pd.DataFrame({
+        "series_id": np.array(sids, dtype=object),
+        "observation_time": pd.to_datetime(np.array(times, dtype="datetime64[us]")),
+        "value": np.array(values, dtype=float),
+    })
+
+
+def read_cold_points(series_ids: list[str], start=None, end=None, limit: int | None = None) -> pd.DataFrame:
+    """
+    Cold rows in [start, end) with naive UTC timestamps. With `limit`, at
+    most `limit` rows per series on average are read, so a series that has
+    more than `limit` still shows at least `limit`.
+    """
+    cold_end = end
+    if limit is not None:
+        # The cold tier's end bound is inclusive: no slot for a row at `end`
+        if end is not None:
+            cold_end = end - timedelta(microseconds=1)
+        limit *= len(series_ids)
+    cold = read_cold_history(series_ids, start=start, end=cold_end, limit=limit)
+    if cold.empty:
+        return cold
+
+    times = pd.to_datetime(cold["observation_time"])
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert("UTC").dt.tz_localize(None)
+    cold["observation_time"] = times
+
+    if start is not None:
+        cold = cold[cold["observation_time"] >= start]
+    if end is not None:
+        cold = cold[cold["observation_time"] < end]
+    return cold
+
+
+# ---------------- LTTB ----------------
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """
+    Indices of the `points` samples kept by Largest-Triangle-Three-Buckets
+    (Steinarsson, 2013). First and last samples are always kept.
+    """
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+
+    # Inner samples split into points - 2 near-equal buckets; the extra
+    # edge makes the last point the "next bucket" of the final one
+    edges = np.append(np.linspace(1, n - 1, points - 1).astype(int), n)
+    keep = np.empty(points, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+
+    a = 0
+    for i in range(points - 2):
+        lo, hi, nxt = edges[i], edges[i + 1], edges[i + 2]
+        cx, cy = x[hi:nxt].mean(), y[hi:nxt].mean()
+
+        # Triangle area between the previous pick, each candidate and
+        # the next bucket's average
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+
+    return keep
+
+
+def downsample(points: pd.DataFrame, target: int) -> pd.DataFrame:
+    """LTTB per series over (series_id, observation_time, value) rows."""
+    frames = []
+    for _, group in points.groupby("series_id", sort=True):
+        t = group["observation_time"].to_numpy("datetime64[us]").astype(np.int64)
+        x = (t - t[0]).astype(float)
+        y = group["value"].to_numpy(float)
+        frames.append(group.iloc[lttb(x, y, target)])
+
+    if not frames:
+        return points
+    return pd.concat(frames, ignore_index=True)
@@ -1,15 +1,131 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from collections import defaultdict
-from app.db.connection import get_db_session
-from app.api.v2.schemas import SeriesResponse, DataPoint
-from app.api.v2.queries import DATA_QUERY
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from collections import namedtuple
+import asyncio
+from datetime import datetime, timezone
+import json
+import pandas as pd
+import pyarrow as pa
+from fastapi.responses import Response
+from app.db.connection import AsyncSessionLocal, get_async_db_session
+from app.api.v2.schemas import BatchSpec, SeriesResponse, DataPoint
+from app.api.v2.queries import build_data_query
+from app.api.v2.pagination import NEXT_CURSOR_HEADER, OBSERVATIONS, decode_cursor, encode_cursor
+from app.api.v2.formats import (
+    ARROW_MEDIA_TYPE, FORMATS, PARQUET_MEDIA_TYPE, render_rows, to_arrow_ipc, to_parquet,
+)
+from app.api.v2.cache import cached_response
+from app.api.v2 import resample
+from app.archive.observations import (
+    cold_upper_bound, reaches_cold, read_cold_rows, stitch_long_history,
+)
 
 router = APIRouter(prefix="/v2", tags=["v2"])
 
+# Per-point JSON gets expensive well before the columnar formats do
+MAX_JSON_LIMIT = 5000
+MAX_COLUMNAR_LIMIT = 100_000
+
+
+DataRow = namedtuple(
+    "DataRow",
+    "series_id dataset_id description unit frequency "
+    "observation_time value quality_flag raw_payload",
+)
+
+
+def _parse_time(value: str | None) -> datetime | None:
+    if value is None:
+        return None
+    # datetime.fromisoformat only accepts a "Z" suffix from Python 3.11
+    if value[-1:] in ("Z", "z"):
+        value = value[:-1] + "+00:00"
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid timestamp: {value}")
+    # observation_time is a naive UTC timestamp
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+async def _merge_cold_rows(
+    db: AsyncSession,
+    hot_rows,
+    series_id: str | None,
+    dataset_id: str | None,
+    start: datetime | None,
+    end: datetime | None,
+    quality_flag: str | None,
+    min_value: float | None,
+    max_value: float | None,
+    include_raw: bool,
+    limit: int,
+    offset: int,
+    after: tuple | None,
+):
+    """
+    Merge rows from the Parquet cold tier into the hot result.
+    Both inputs hold at most offset + limit rows ordered by time; hot rows
+    win on duplicate (series_id, observation_time).
+    """
+    where = []
+    params = {}
+
+    if series_id is not None:
+        where.append("series_id = :series_id")
+        params["series_id"] = series_id
+    if dataset_id is not None:
+        where.append("dataset_id = :dataset_id")
+        params["dataset_id"] = dataset_id
+
+    meta = {
+        r.series_id: r
+        for r in (await db.execute(
+            text(f"""
+                SELECT series_id, dataset_id, description, unit, frequency
+                FROM meta_series
+                {'WHERE ' + ' AND '.join(where) if where else ''}
+            """),
+            params,
+        )).fetchall()
+    }
+
+    # DuckDB blocks: keep it off the event loop
+    cold_rows = await asyncio.to_thread(
+        read_cold_rows,
+        list(meta),
+        start=start,
+        end=end,
+        quality_flag=quality_flag,
+        min_value=min_value,
+        max_value=max_value,
+        include_raw=include_raw,
+        limit=offset + limit,
+        after=after,
+    )
+
+    merged = {}
+    for sid, ts, value, flag, payload in cold_rows:
+        m = meta[sid]
+        merged[(sid, ts)] = DataRow(
+            sid, m.dataset_id, m.description, m.unit, m.frequency,
+            ts, value, flag, payload,
+        )
+    for r in hot_rows:
+        merged[(r.series_id, r.observation_time)] = r
+
+    ordered = sorted(merged.values(), key=lambda r: (r.observation_time, r.series_id))
+    return ordered[offset:offset + limit]
+
 
 @router.get("/data", response_model=list[SeriesResponse])
-def get_data(
+async def get_data(
+    request: Request,
     series_id: str | None = None,
     dataset_id: str | None = None,
     start: str | None = None,
@@ -17,45 +133,352 @@ def get_data(
     quality_flag: str | None = None,
     min_value: float | None = None,
     max_value: float | None = None,
-    limit: int = Query(1000, le=5000),
+    limit: int = Query(1000, ge=1, le=MAX_COLUMNAR_LIMIT, description=f"Up to {MAX_JSON_LIMIT} for json/compact"),
     offset: int = 0,
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
     include_raw: bool = False,
-    db: Session = Depends(get_db_session),
+    fmt: str = Query(
+        "json",
+        alias="format",
+        pattern=f"^({'|'.join(FORMATS)})$",
+        description="json (default), compact, arrow or parquet",
+    ),
+    db: AsyncSession = Depends(get_async_db_session),
 ):
-    rows = db.execute(
-        DATA_QUERY,
-        {
-            "series_id": series_id,
-            "dataset_id": dataset_id,
-            "start": start,
-            "end": end,
-            "quality_flag": quality_flag,
-            "min_value": min_value,
-            "max_value": max_value,
-            "limit": limit,
-            "offset": offset,
-        },
-    ).fetchall()
-
-    grouped = defaultdict(lambda: {"points": []})
-
-    for r in rows:
-        key = r.series_id
-        grouped[key].update({
-            "series_id": r.series_id,
-            "dataset_id": r.dataset_id,
-            "description": r.description,
-            "unit": r.unit,
-            "frequency": r.frequency,
-        })
-
-        grouped[key]["points"].append(
-            DataPoint(
-                timestamp=r.observation_time,
-                value=r.value,
-                quality_flag=r.quality_flag,
-                raw_payload=r.raw_payload if include_raw else None,
+    if cursor and offset:
+        raise HTTPException(status_code=400, detail="Use either cursor or offset")
+    if fmt in ("json", "compact") and limit > MAX_JSON_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit above {MAX_JSON_LIMIT} needs format=arrow or parquet")
+
+    start_dt = _parse_time(start)
+    end_dt = _parse_time(end)
+    after = decode_cursor(cursor, OBSERVATIONS) if cursor else None
+
+    async def build():
+        # Ranges reaching the cold tier are merged after fetching, so the hot
+        # query returns the first offset + limit rows instead of one page.
+        stitched = reaches_cold(after[0] if after else start_dt)
+
+        query, params = build_data_query(
+            series_id=series_id,
+            dataset_id=dataset_id,
+            start=start_dt,
+            end=end_dt,
+            quality_flag=quality_flag,
+            min_value=min_value,
+            max_value=max_value,
+            after=after,
+            limit=offset + limit if stitched else limit,
+            offset=0 if stitched else offset,
+        )
+        rows = (await db.execute(query, params)).fetchall()
+
+        if stitched:
+            rows = await _merge_cold_rows(
+                db, rows, series_id, dataset_id, start_dt, end_dt,
+                quality_flag, min_value, max_value, include_raw, limit, offset, after,
+            )
+
+        # Keyset cursor for the next page (only when this page is full)
+        headers = {}
+        if len(rows) == limit:
+            last = rows[-1]
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(
+                OBSERVATIONS, last.observation_time, last.series_id
+            )
+
+        # Columnar formats skip the per-point models
+        if fmt != "json":
+            return render_rows(rows, fmt, include_raw, headers=headers)
+
+        grouped = {}
+
+        for r in rows:
+            key = r.series_id
+            if key not in grouped:
+                grouped[key] = {
+                    "series_id": r.series_id,
+                    "dataset_id": r.dataset_id,
+                    "description": r.description,
+                    "unit": r.unit,
+                    "frequency": r.frequency,
+                    "points": [],
+                }
+
+            grouped[key]["points"].append(
+                DataPoint(
+                    timestamp=r.observation_time,
+                    value=r.value,
+                    quality_flag=r.quality_flag,
+                    raw_payload=r.raw_payload if include_raw else None,
+                )
+            )
+
+        return JSONResponse(jsonable_encoder(list(grouped.values())), headers=headers)
+
+    return await cached_response(request, [dataset_id] if dataset_id else None, build)
+
+
+# ---------------- Resampling ----------------
+
+MAX_RESAMPLE_SERIES = 50
+MAX_LTTB_POINTS = 100_000       # raw points read per series before downsampling
+
+
+def _json_values(values: pd.Series) -> list:
+    """Column values for JSON, NaN (e.g. the mean of an empty bucket) as null."""
+    return values.astype(object).where(values.notna(), None).tolist()
+
+
+def _resample_response(frame: pd.DataFrame, meta: dict, value_columns: list[str], fmt: str, extra: dict):
+    """
+    json: one object per series with timestamps[] and one array per value
+    column; arrow/parquet: a long table (series_id, timestamp, columns...).
+    """
+    if fmt == "json":
+        body = []
+        for sid, group in frame.groupby("series_id", sort=True):
+            m = meta[sid]
+            s = {
+                "series_id": sid,
+                "dataset_id": m.dataset_id,
+                "unit": m.unit,
+                "frequency": m.frequency,
+                **extra,
+                "timestamps": [t.isoformat() for t in group["timestamp"]],
+            }
+            for col in value_columns:
+                s[col] = _json_values(group[col])
+            body.append(s)
+        return Response(json.dumps(body, separators=(",", ":")).encode(), media_type="application/json")
+
+    arrays = {
+        "series_id": pa.array(frame["series_id"].tolist(), type=pa.string()).dictionary_encode(),
+        "timestamp": pa.array(frame["timestamp"].tolist(), type=pa.timestamp("us", tz="UTC")),
+    }
+    for col in value_columns:
+        arrays[col] = pa.array(frame[col].tolist(), type=pa.int64() if col == "count" else pa.float64())
+    table = pa.table(arrays)
+
+    if fmt == "arrow":
+        return Response(to_arrow_ipc(table), media_type=ARROW_MEDIA_TYPE)
+    return Response(to_parquet(table), media_type=PARQUET_MEDIA_TYPE)
+
+
+async def _series_frame(
+    db: AsyncSession,
+    ids: list[str],
+    start_dt: datetime | None,
+    end_dt: datetime | None,
+    width=None,
+    aggregates: list[str] = (),
+    points: int | None = None,
+    max_points: int | None = None,
+) -> pd.DataFrame:
+    """
+    Long frame (series_id, timestamp, columns...) of the series over
+    [start_dt, end_dt), sorted by series_id and timestamp: `aggregates` per
+    bucket of `width`, or the raw values (LTTB-downsampled to `points`
+    when given). A series with more than `max_points` raw values is a 400;
+    no more than one past that is read.
+    """
+    bucketed = width is not None
+    limit = None if bucketed or max_points is None else max_points + 1
+
+    # Everything before `split` is bucketed/downsampled in pandas from
+    # stitched cold + hot rows; the rest comes straight from Postgres
+    split = None
+    head = None
+    if reaches_cold(start_dt):
+        upper = datetime.combine(cold_upper_bound(), datetime.min.time())
+        split = resample.next_boundary(upper, width) if bucketed else upper
+        if end_dt is not None:
+            split = min(split, end_dt)
+
+        cold = await asyncio.to_thread(resample.read_cold_points, ids, start_dt, split, limit)
+        query, params = resample.raw_points_query(start_dt, split, limit)
+        hot = (await db.execute(query, {**params, "series_ids": ids})).fetchall()
+        head = stitch_long_history(cold, resample.points_frame(hot))
+
+    tail_start = max(start_dt, split) if start_dt and split else (split or start_dt)
+
+    if bucketed:
+        # Whole-hour and gas-day intervals are served from the rollups
+        query, params = (
+            resample.rollup_query(width, aggregates, tail_start, end_dt)
+            or resample.bucket_query(width, aggregates, tail_start, end_dt)
+        )
+        result = await db.execute(query, {**params, "series_ids": ids})
+        frame = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+        if head is not None:
+            frame = pd.concat(
+                [resample.bucket_frame(head, width, aggregates), frame], ignore_index=True
             )
+        frame = frame.rename(columns={"bucket": "timestamp"})
+    else:
+        query, params = resample.raw_points_query(tail_start, end_dt, limit)
+        result = await db.execute(query, {**params, "series_ids": ids})
+        frame = resample.points_frame(result.fetchall())
+        if head is not None:
+            frame = pd.concat([head, frame], ignore_index=True)
+        if max_points is not None:
+            counts = frame["series_id"].value_counts()
+            over = sorted(counts.index[counts > max_points])
+            if over:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"{over[0]}: more than {max_points} raw points, "
+                           "narrow the range or use a coarser resolution",
+                )
+        if points is not None:
+            frame = await asyncio.to_thread(resample.downsample, frame, points)
+        frame = frame.rename(columns={"observation_time": "timestamp"})
+
+    return frame.sort_values(["series_id", "timestamp"], kind="stable")
+
+
+@router.get("/data/resample")
+async def resample_data(
+    request: Request,
+    series_id: list[str] = Query(..., description="Repeat for several series"),
+    start: str | None = Query(None, description="Inclusive"),
+    end: str | None = Query(None, description="Exclusive"),
+    method: str = Query("bucket", pattern="^(bucket|lttb)$"),
+    interval: str = Query("1h", description="bucket: 15min, 1h, 1d, 1w, ... or gasday"),
+    agg: list[str] = Query(["mean"], description=f"bucket: {', '.join(resample.AGGREGATES)}"),
+    points: int = Query(1000, ge=3, le=10000, description="lttb: points kept per series"),
+    fmt: str = Query("json", alias="format", pattern="^(json|arrow|parquet)$"),
+    db: AsyncSession = Depends(get_async_db_session),
+):
+    series_ids = list(dict.fromkeys(series_id))
+    if len(series_ids) > MAX_RESAMPLE_SERIES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_RESAMPLE_SERIES} series per request")
+
+    bucketed = method == "bucket"
+    width = resample.parse_interval(interval) if bucketed else None
+    aggregates = resample.parse_aggregates(agg) if bucketed else []
+    start_dt = _parse_time(start)
+    end_dt = _parse_time(end)
+
+    meta = {
+        r.series_id: r
+        for r in (await db.execute(
+            text("""
+                SELECT series_id, dataset_id, unit, frequency
+                FROM meta_series
+                WHERE series_id = ANY(:series_ids)
+            """),
+            {"series_ids": series_ids},
+        )).fetchall()
+    }
+    if not meta:
+        raise HTTPException(status_code=404, detail="Unknown series_id")
+
+    async def build():
+        frame = await _series_frame(
+            db, sorted(meta), start_dt, end_dt, width, aggregates,
+            None if bucketed else points, max_points=MAX_LTTB_POINTS,
         )
+        if bucketed:
+            extra = {"interval": interval}
+            columns = aggregates
+        else:
+            extra = {"points": points}
+            columns = ["value"]
+        return _resample_response(frame, meta, columns, fmt, {"method": method, **extra})
+
+    dataset_ids = sorted({m.dataset_id for m in meta.values()})
+    return await cached_response(request, dataset_ids, build)
+
+
+# ---------------- Batch ----------------
+
+MAX_BATCH_SPECS = 50
+MAX_BATCH_POINTS = 100_000     # raw points per spec
+BATCH_CONCURRENCY = 4          # sessions per batch request
+
+
+@router.post("/data/batch")
+async def get_data_batch(
+    request: Request,
+    specs: list[BatchSpec],
+    db: AsyncSession = Depends(get_async_db_session),
+):
+    """
+    Several series/ranges/resolutions in one round trip (e.g. every panel
+    of a dashboard). Specs sharing start, end and resolution are answered
+    by one query over all their series; those queries run concurrently.
+    Results come back in request order, one columnar object per spec.
+    """
+    if not specs:
+        raise HTTPException(status_code=400, detail="No specs")
+    if len(specs) > MAX_BATCH_SPECS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SPECS} specs per request")
+
+    widths = {}
+    keys = []
+    groups = {}
+    for spec in specs:
+        if spec.resolution == "raw":
+            aggregates = ()
+        else:
+            widths[spec.resolution] = resample.parse_interval(spec.resolution)
+            aggregates = tuple(resample.parse_aggregates(spec.agg))
+
+        key = (spec.resolution, aggregates, _parse_time(spec.start), _parse_time(spec.end))
+        keys.append(key)
+        groups.setdefault(key, set()).add(spec.series_id)
+
+    series_ids = sorted({spec.series_id for spec in specs})
+    meta = {
+        r.series_id: r
+        for r in (await db.execute(
+            text("""
+                SELECT series_id, dataset_id, unit, frequency
+                FROM meta_series
+                WHERE series_id = ANY(:series_ids)
+            """),
+            {"series_ids": series_ids},
+        )).fetchall()
+    }
+    unknown = [s for s in series_ids if s not in meta]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Unknown series_id: {', '.join(unknown)}")
+
+    async def build():
+        limit = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def run(key, ids):
+            resolution, aggregates, start_dt, end_dt = key
+            # One session per group: an AsyncSession runs one query at a time
+            async with limit, AsyncSessionLocal() as session:
+                frame = await _series_frame(
+                    session, sorted(ids), start_dt, end_dt, widths.get(resolution), list(aggregates),
+                    max_points=MAX_BATCH_POINTS,
+                )
+            return key, {sid: rows for sid, rows in frame.groupby("series_id", sort=False)}
+
+        results = dict(await asyncio.gather(*(run(k, ids) for k, ids in groups.items())))
+
+        body = []
+        for spec, key in zip(specs, keys):
+            rows = results[key].get(spec.series_id)
+            columns = list(key[1]) or ["value"]
+
+            m = meta[spec.series_id]
+            item = {
+                "series_id": spec.series_id,
+                "dataset_id": m.dataset_id,
+                "unit": m.unit,
+                "frequency": m.frequency,
+                "resolution": spec.resolution,
+                "timestamps": [] if rows is None else [t.isoformat() for t in rows["timestamp"]],
+            }
+            for col in columns:
+                item[col] = [] if rows is None else _json_values(rows[col])
+            body.append(item)
+
+        return Response(json.dumps(body, separators=(",", ":")).encode(), media_type="application/json")
 
-    return list(grouped.values())
+    dataset_ids = sorted({m.dataset_id for m in meta.values()})
+    return await cached_response(request, dataset_ids, build, body=await request.body())
@@ -22,4 +22,11 @@ class SeriesResponse(BaseModel):
 class GasPublicationRequest(BaseModel):
     from_date: str
     to_date: str
-    publication_ids: List[str]
\ No newline at end of file
+    publication_ids: List[str]
+
+class BatchSpec(BaseModel):
+    series_id: str
+    start: Optional[str] = None        # inclusive
+    end: Optional[str] = None          # exclusive
+    resolution: str = "raw"            # raw, or a bucket interval (15min, 1h, 1d, gasday, ...)
+    agg: List[str] = ["mean"]          # aggregates per bucket (ignored for raw)
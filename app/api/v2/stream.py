@@ -0,0 +1,236 @@
+"""
+Push new observations to clients instead of having them poll /v2/data.
+
+Each API worker keeps one asyncpg connection LISTENing on the
+observations channel (see app.db.notify). For every committed batch that
+some subscriber cares about, the worker reads the new points once and
+fans them out to the matching subscribers over Server-Sent Events
+(GET /v2/stream) or a WebSocket (/v2/stream/ws).
+"""
+import asyncio
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import asyncpg
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from sqlalchemy import text
+
+from app.config.settings import settings
+from app.db.connection import async_engine
+from app.db.notify import OBSERVATIONS_CHANNEL
+from app.utils.logger import logger
+
+
+router = APIRouter(prefix="/v2", tags=["Stream"])
+
+# Seconds between keep-alives (also how soon a lost LISTEN connection is retried)
+HEARTBEAT_SECONDS = 15
+
+# Events buffered per subscriber; a client that falls further behind is dropped
+SUBSCRIBER_QUEUE = 1000
+
+POINTS_SQL = text("""
+    SELECT m.series_id, d.observation_time, d.value, q.flag AS quality_flag
+    FROM data_observations d
+    JOIN meta_series m ON m.series_key = d.series_key
+    LEFT JOIN quality_flags q ON q.flag_id = d.quality_flag_id
+    WHERE m.series_id = ANY(:series_ids)
+      AND d.observation_time BETWEEN :first AND :last
+      AND d.ingestion_time = :ingestion_time
+    ORDER BY m.series_id, d.observation_time
+""")
+
+
+@dataclass(eq=False)
+class Subscriber:
+    series_ids: set[str] | None
+    dataset_ids: set[str] | None
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(SUBSCRIBER_QUEUE))
+    dropped: bool = False
+
+    def wants(self, series_id: str, dataset_id: str) -> bool:
+        if self.series_ids is not None and series_id not in self.series_ids:
+            return False
+        return self.dataset_ids is None or dataset_id in self.dataset_ids
+
+
+class ObservationHub:
+    def __init__(self):
+        self.subscribers: set[Subscriber] = set()
+        self.datasets: dict[str, str] = {}      # series_id -> dataset_id
+        self._conn = None
+        self._connecting = asyncio.Lock()
+        self._tasks: set[asyncio.Task] = set()     # dispatches in flight
+
+    async def ensure_listening(self) -> None:
+        if self._conn is not None and not self._conn.is_closed():
+            return
+
+        async with self._connecting:
+            if self._conn is not None and not self._conn.is_closed():
+                return
+            try:
+                self._conn = await asyncpg.connect(
+                    host=settings.DB_HOST,
+                    port=settings.DB_PORT,
+                    user=settings.DB_USER,
+                    password=settings.DB_PASSWORD,
+                    database=settings.DB_NAME,
+                )
+                await self._conn.add_listener(OBSERVATIONS_CHANNEL, self._on_notify)
+                logger.info(f"Listening on {OBSERVATIONS_CHANNEL}")
+            except (OSError, asyncpg.PostgresError) as e:
+                self._conn = None
+                logger.warning(f"LISTEN {OBSERVATIONS_CHANNEL} failed: {e}")
+
+    async def subscribe(self, series_ids: list[str] | None, dataset_ids: list[str] | None) -> Subscriber:
+        await self.ensure_listening()
+        sub = Subscriber(
+            set(series_ids) if series_ids else None,
+            set(dataset_ids) if dataset_ids else None,
+        )
+        self.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self.subscribers.discard(sub)
+
+    def _on_notify(self, conn, pid, channel, payload) -> None:
+        if self.subscribers:
+            # The loop keeps only weak references to tasks
+            task = asyncio.get_running_loop().create_task(self._dispatch(payload))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dataset_ids(self, series_ids: list[str]) -> dict[str, str]:
+        missing = [s for s in series_ids if s not in self.datasets]
+        if missing:
+            async with async_engine.connect() as conn:
+                rows = await conn.execute(
+                    text("SELECT series_id, dataset_id FROM meta_series WHERE series_id = ANY(:ids)"),
+                    {"ids": missing},
+                )
+                self.datasets.update({r.series_id: r.dataset_id for r in rows})
+        return {s: self.datasets.get(s) for s in series_ids}
+
+    async def _dispatch(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+            ranges = {sid: (first, last) for sid, first, last in message["series"]}
+            datasets = await self._dataset_ids(list(ranges))
+
+            wanted = [
+                sid for sid in ranges
+                if any(sub.wants(sid, datasets[sid]) for sub in self.subscribers)
+            ]
+            if not wanted:
+                return
+
+            # One read per batch and worker, however many subscribers
+            async with async_engine.connect() as conn:
+                rows = (await conn.execute(POINTS_SQL, {
+                    "series_ids": wanted,
+                    "first": datetime.fromisoformat(min(ranges[s][0] for s in wanted)),
+                    "last": datetime.fromisoformat(max(ranges[s][1] for s in wanted)),
+                    "ingestion_time": datetime.fromisoformat(message["t"]),
+                })).fetchall()
+        except Exception as e:
+            logger.error(f"Observation notification failed: {e}")
+            return
+
+        points = {}
+        for r in rows:
+            points.setdefault(r.series_id, []).append({
+                "timestamp": r.observation_time.isoformat(),
+                "value": r.value,
+                "quality_flag": r.quality_flag,
+            })
+
+        for sid, series_points in points.items():
+            event = json.dumps(
+                {"series_id": sid, "dataset_id": datasets[sid], "points": series_points},
+                separators=(",", ":"),
+            )
+            for sub in list(self.subscribers):
+                if not sub.wants(sid, datasets[sid]):
+                    continue
+                try:
+                    sub.queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    sub.dropped = True
+                    self.unsubscribe(sub)
+
+    async def events(self, sub: Subscriber):
+        """The subscriber's events as they arrive; None on each heartbeat."""
+        while not sub.dropped or not sub.queue.empty():
+            try:
+                yield await asyncio.wait_for(sub.queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                await self.ensure_listening()
+                yield None
+
+
+hub = ObservationHub()
+
+
+@router.get("/stream")
+async def stream_observations(
+    series_id: list[str] | None = Query(None, description="Repeat for several series"),
+    dataset_id: list[str] | None = Query(None, description="Repeat for several datasets"),
+):
+    """
+    Server-Sent Events: one `observations` event per series and committed
+    batch, with the new points. All series when no filter is given.
+    """
+    sub = await hub.subscribe(series_id, dataset_id)
+
+    async def body():
+        try:
+            yield ": connected\n\n"
+            async for event in hub.events(sub):
+                yield ": ping\n\n" if event is None else f"event: observations\ndata: {event}\n\n"
+        finally:
+            hub.unsubscribe(sub)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/stream/ws")
+async def stream_observations_ws(
+    websocket: WebSocket,
+    series_id: list[str] | None = Query(None),
+    dataset_id: list[str] | None = Query(None),
+):
+    """The same events as /v2/stream, one JSON text message each."""
+    await websocket.accept()
+    sub = await hub.subscribe(series_id, dataset_id)
+
+    async def until_closed():
+        # Notices a client that goes away while none of its series change
+        try:
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+        except Exception:
+            pass
+        finally:
+            sub.dropped = True
+            hub.unsubscribe(sub)
+
+    closed = asyncio.create_task(until_closed())
+    try:
+        async for event in hub.events(sub):
+            if event is not None and not closed.done():
+                await websocket.send_text(event)
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.warning(f"WebSocket stream closed: {e}")
+    finally:
+        closed.cancel()
+        hub.unsubscribe(sub)
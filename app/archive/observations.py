@@ -0,0 +1,363 @@
+"""
+Cold tier for data_observations.
+
+Monthly partitions older than OBS_COLD_AFTER_MONTHS are exported to
+
+    {ARCHIVE_DIR}/observations/month=YYYY-MM/data.parquet
+
+(sorted by series_id, observation_time so row-group statistics prune well)
+and then detached and dropped from Postgres. Cold files are queried
+in-process with DuckDB; readers stitch cold and hot rows by time, with hot
+rows winning when late data re-created a month that is already cold.
+
+Run with:  python -m app.archive.observations
+"""
+import json
+import os
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import text
+
+from app.config.settings import settings
+from app.db.connection import engine
+from app.db.partitions import (
+    add_months,
+    detach_partition,
+    is_partitioned,
+    list_partitions,
+    month_start,
+    partition_name,
+)
+from app.utils.logger import logger
+
+
+EXPORT_BATCH_ROWS = 100_000
+
+COLD_COLUMNS = ["series_id", "observation_time", "value", "quality_flag", "raw_payload"]
+
+
+def cold_root() -> Path:
+    return Path(settings.ARCHIVE_DIR) / "observations"
+
+
+def _month_file(month: date) -> Path:
+    return cold_root() / f"month={month:%Y-%m}" / "data.parquet"
+
+
+def _sql_path(path: Path) -> str:
+    return "'" + str(path).replace("'", "''") + "'"
+
+
+def _cold_schema(aware: bool) -> pa.Schema:
+    return pa.schema([
+        ("series_id", pa.string()),
+        ("observation_time", pa.timestamp("us", tz="UTC" if aware else None)),
+        ("value", pa.float64()),
+        ("quality_flag", pa.string()),
+        ("raw_payload", pa.string()),    # JSON text
+    ])
+
+
+# -------------------- EXPORT --------------------
+
+def export_cold_observations(after_months: int | None = None) -> list[date]:
+    """
+    Move every partition that ends before (current month - after_months)
+    into the cold tier. Returns the exported months.
+    """
+    if after_months is None:
+        after_months = settings.OBS_COLD_AFTER_MONTHS
+
+    if not after_months or after_months <= 0:
+        return []
+
+    cutoff = add_months(month_start(datetime.now(timezone.utc)), -after_months)
+
+    with engine.connect() as conn:
+        if not is_partitioned(conn):
+            return []
+        months = [m for m in list_partitions(conn) if add_months(m, 1) <= cutoff]
+
+    for month in months:
+        _export_month(month)
+
+    return months
+
+
+def _export_month(month: date) -> None:
+    name = partition_name(month)
+    target = _month_file(month)
+    incoming = target.with_name("incoming.parquet")
+
+    with engine.begin() as conn:
+        # Block writers to this month until it is dropped
+        conn.execute(text(f"LOCK TABLE {name} IN SHARE MODE"))
+
+        result = conn.execute(text(f"""
+            SELECT m.series_id, d.observation_time, d.value,
+                   q.flag, d.raw_payload::text
+            FROM {name} d
+            JOIN meta_series m ON m.series_key = d.series_key
+            LEFT JOIN quality_flags q ON q.flag_id = d.quality_flag_id
+            ORDER BY m.series_id, d.observation_time
+        """).execution_options(stream_results=True, yield_per=EXPORT_BATCH_ROWS))
+
+        writer = None
+        rows = 0
+
+        try:
+            for chunk in result.partitions():
+                columns = list(zip(*chunk))
+
+                if writer is None:
+                    schema = _cold_schema(aware=columns[1][0].tzinfo is not None)
+                    incoming.parent.mkdir(parents=True, exist_ok=True)
+                    writer = pq.ParquetWriter(incoming, schema, compression="zstd")
+
+                writer.write_table(pa.table(
+                    {f.name: pa.array(col, type=f.type) for f, col in zip(schema, columns)},
+                    schema=schema,
+                ))
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+
+        if rows:
+            _merge_into(target, incoming)
+
+        detach_partition(conn, month, drop=True)
+
+    logger.info(f"Moved {rows} observations of {name} to the cold tier")
+
+
+def _merge_into(target: Path, incoming: Path) -> None:
+    """
+    Publish incoming rows as the month file. If the month is already cold
+    (late data re-created the partition) the files are merged, keeping the
+    incoming version of duplicate (series_id, observation_time) rows.
+    """
+    if not target.exists():
+        os.replace(incoming, target)
+        return
+
+    tmp = target.with_name("merge.tmp")
+    con = duckdb.connect()
+    try:
+        con.execute("SET TimeZone = 'UTC'")
+        con.execute(f"""
+            COPY (
+                SELECT * EXCLUDE (src)
+                FROM (
+                    SELECT *, 1 AS src FROM read_parquet({_sql_path(incoming)})
+                    UNION ALL BY NAME
+                    SELECT *, 0 AS src FROM read_parquet({_sql_path(target)})
+                )
+                QUALIFY row_number() OVER (
+                    PARTITION BY series_id, observation_time ORDER BY src DESC
+                ) = 1
+                ORDER BY series_id, observation_time
+            ) TO {_sql_path(tmp)} (FORMAT parquet, COMPRESSION zstd)
+        """)
+    finally:
+        con.close()
+
+    os.replace(tmp, target)
+    incoming.unlink(missing_ok=True)
+
+
+# -------------------- READ --------------------
+
+def cold_months() -> list[date]:
+    root = cold_root()
+    if not root.exists():
+        return []
+
+    months = []
+    for p in root.iterdir():
+        if p.name.startswith("month=") and (p / "data.parquet").exists():
+            months.append(datetime.strptime(p.name[len("month="):], "%Y-%m").date())
+
+    return sorted(months)
+
+
+def cold_upper_bound() -> date | None:
+    """First instant (UTC month start) not covered by the cold tier."""
+    months = cold_months()
+    return add_months(months[-1], 1) if months else None
+
+
+def reaches_cold(start) -> bool:
+    upper = cold_upper_bound()
+    if upper is None:
+        return False
+    if start is None:
+        return True
+    return month_start(start) < upper
+
+
+def _files_for(start, end) -> list[str]:
+    lo = month_start(start) if start is not None else None
+    hi = month_start(end) if end is not None else None
+
+    return [
+        str(_month_file(m))
+        for m in cold_months()
+        if (lo is None or m >= lo) and (hi is None or m <= hi)
+    ]
+
+
+def _query_cold(
+    columns: list[str],
+    series_ids: list[str],
+    start=None,
+    end=None,
+    quality_flag: str | None = None,
+    min_value: float | None = None,
+    max_value: float | None = None,
+    limit: int | None = None,
+    after: tuple | None = None,
+):
+    if after is not None and (start is None or after[0] > start):
+        start = after[0]
+
+    files = _files_for(start, end)
+    if not files or not series_ids:
+        return None, None
+
+    # Placeholder list (not an array) so DuckDB can prune row groups
+    where = [f"series_id IN ({', '.join('?' for _ in series_ids)})"]
+    params: list = list(series_ids)
+
+    if start is not None:
+        where.append("observation_time >= ?")
+        params.append(start)
+    if end is not None:
+        where.append("observation_time <= ?")
+        params.append(end)
+    if quality_flag is not None:
+        where.append("quality_flag = ?")
+        params.append(quality_flag)
+    if min_value is not None:
+        where.append("value >= ?")
+        params.append(min_value)
+    if max_value is not None:
+        where.append("value <= ?")
+        params.append(max_value)
+    if after is not None:
+        where.append("(observation_time > ? OR (observation_time = ? AND series_id > ?))")
+        params.extend([after[0], after[0], after[1]])
+
+    sql = f"""
+        SELECT {', '.join(columns)}
+        FROM read_parquet(?)
+        WHERE {' AND '.join(where)}
+        ORDER BY observation_time, series_id
+    """
+    if limit is not None:
+        sql += f" LIMIT {int(limit)}"
+
+    con = duckdb.connect()
+    con.execute("SET TimeZone = 'UTC'")
+    return con, con.execute(sql, [files] + params)
+
+
+def read_cold_rows(
+    series_ids: list[str],
+    start=None,
+    end=None,
+    quality_flag: str | None = None,
+    min_value: float | None = None,
+    max_value: float | None = None,
+    include_raw: bool = False,
+    limit: int | None = None,
+    after: tuple | None = None,
+) -> list[tuple]:
+    """
+    Cold rows as (series_id, observation_time, value, quality_flag,
+    raw_payload) tuples ordered by (observation_time, series_id), starting
+    after the keyset position `after` when given.
+    """
+    con, cur = _query_cold(
+        COLD_COLUMNS, series_ids, start, end,
+        quality_flag, min_value, max_value, limit, after,
+    )
+    if con is None:
+        return []
+
+    try:
+        rows = cur.fetchall()
+    finally:
+        con.close()
+
+    if include_raw:
+        return [(s, t, v, q, json.loads(p) if p else None) for s, t, v, q, p in rows]
+    return [(s, t, v, q, None) for s, t, v, q, _ in rows]
+
+
+def read_cold_history(series_ids: list[str], start=None, end=None, limit: int | None = None) -> pd.DataFrame:
+    """
+    Cold rows as a DataFrame (series_id, observation_time, value),
+    built column-wise by DuckDB; the first `limit` by time when given.
+    """
+    con, cur = _query_cold(["series_id", "observation_time", "value"], series_ids, start, end, limit=limit)
+    if con is None:
+        return pd.DataFrame(columns=["series_id", "observation_time", "value"])
+
+    try:
+        return cur.df()
+    finally:
+        con.close()
+
+
+def stitch_history(cold: pd.DataFrame, hot: pd.DataFrame) -> pd.DataFrame:
+    """
+    Combine cold and hot observation_time-indexed frames. Hot rows win on
+    duplicate timestamps; the result keeps the hot frame's timezone style.
+    """
+    if cold.empty:
+        return hot
+
+    cold = cold.set_index("observation_time")[hot.columns]
+
+    if isinstance(hot.index, pd.DatetimeIndex) and hot.index.tz is not None:
+        hot = hot.tz_convert("UTC")
+    elif not hot.empty and cold.index.tz is not None:
+        cold = cold.tz_convert("UTC").tz_localize(None)
+
+    combined = pd.concat([cold, hot])
+    combined = combined[~combined.index.duplicated(keep="last")]
+    return combined.sort_index()
+
+
+def stitch_long_history(cold: pd.DataFrame, hot: pd.DataFrame) -> pd.DataFrame:
+    """
+    stitch_history() for long (series_id, observation_time, value) frames,
+    in one vectorised pass. Sorted by series_id, observation_time.
+    """
+    if cold.empty:
+        return hot
+
+    cold = cold[hot.columns]
+    hot_tz = getattr(hot["observation_time"].dtype, "tz", None)
+    cold_tz = getattr(cold["observation_time"].dtype, "tz", None)
+
+    if hot_tz is not None:
+        hot = hot.assign(observation_time=hot["observation_time"].dt.tz_convert("UTC"))
+    elif not hot.empty and cold_tz is not None:
+        cold = cold.assign(
+            observation_time=cold["observation_time"].dt.tz_convert("UTC").dt.tz_localize(None)
+        )
+
+    combined = pd.concat([cold, hot], ignore_index=True)
+    combined = combined.drop_duplicates(["series_id", "observation_time"], keep="last")
+    return combined.sort_values(["series_id", "observation_time"], ignore_index=True)
+
+
+if __name__ == "__main__":
+    export_cold_observations()
@@ -0,0 +1,401 @@
+"""
+Archival of raw_events into compressed Parquet files.
+
+Events older than RAW_ARCHIVE_AFTER_DAYS are moved out of Postgres into
+
+    {ARCHIVE_DIR}/raw_events/dataset_id={dataset}/day={YYYY-MM-DD}/part-*.parquet
+
+and deleted from raw_events. Readers use fetch_raw_page(), which serves
+the hot rows from Postgres and tops up from the archive when a request
+reaches past the hot window; iter_raw_payloads() streams a whole dataset.
+
+Run with:  python -m app.archive.raw_events
+"""
+import asyncio
+import json
+import os
+import uuid
+from datetime import date, datetime, timedelta
+from itertools import islice
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from sqlalchemy import text
+
+from app.config.settings import settings
+from app.db.connection import async_engine, engine
+from app.utils.logger import logger
+
+
+ARCHIVE_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("source", pa.string()),
+    ("dataset_id", pa.string()),
+    ("series_hint", pa.string()),
+    ("event_time", pa.timestamp("us")),
+    ("ingested_at", pa.timestamp("us")),
+    ("raw_payload", pa.string()),    # JSON text, as stored in Postgres
+])
+
+# Rows per round trip of the server-side cursor in iter_raw_payloads()
+STREAM_BATCH_ROWS = 5000
+
+
+def archive_root() -> Path:
+    return Path(settings.ARCHIVE_DIR) / "raw_events"
+
+
+def _day_dir(dataset_id: str, day: date) -> Path:
+    return archive_root() / f"dataset_id={dataset_id}" / f"day={day.isoformat()}"
+
+
+# -------------------- ARCHIVE --------------------
+
+def archive_raw_events(older_than_days: int | None = None) -> int:
+    """
+    Move raw events older than the cutoff into Parquet, one file per
+    (dataset, day) and run. Returns the number of archived rows.
+    """
+    if older_than_days is None:
+        older_than_days = settings.RAW_ARCHIVE_AFTER_DAYS
+
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+
+    with engine.connect() as conn:
+        groups = conn.execute(
+            text("""
+                SELECT dataset_id, CAST(ingested_at AS DATE) AS day
+                FROM raw_events
+                WHERE ingested_at < :cutoff
+                GROUP BY 1, 2
+                ORDER BY 1, 2
+            """),
+            {"cutoff": cutoff},
+        ).fetchall()
+
+    total = 0
+    for dataset_id, day in groups:
+        total += _archive_day(dataset_id, day, cutoff)
+
+    if total:
+        logger.info(f"Archived {total} raw events older than {cutoff:%Y-%m-%d}")
+
+    return total
+
+
+def _archive_day(dataset_id: str, day: date, cutoff: datetime) -> int:
+    out_dir = _day_dir(dataset_id, day)
+    path = out_dir / f"part-{uuid.uuid4().hex}.parquet"
+    tmp = path.with_suffix(".tmp")
+
+    # The part is written to .tmp inside the transaction and published only
+    # after the DELETE has committed, so rows are never in both places
+    try:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                text("""
+                    SELECT id::text, source, dataset_id, series_hint,
+                           event_time, ingested_at, raw_payload::text
+                    FROM raw_events
+                    WHERE dataset_id = :dataset_id
+                      AND ingested_at >= :day
+                      AND ingested_at < :next_day
+                      AND ingested_at < :cutoff
+                    ORDER BY ingested_at, id
+                    FOR UPDATE
+                """),
+                {
+                    "dataset_id": dataset_id,
+                    "day": day,
+                    "next_day": day + timedelta(days=1),
+                    "cutoff": cutoff,
+                },
+            ).fetchall()
+
+            if not rows:
+                return 0
+
+            columns = list(zip(*rows))
+            table = pa.table(
+                {field.name: pa.array(col, type=field.type)
+                 for field, col in zip(ARCHIVE_SCHEMA, columns)},
+                schema=ARCHIVE_SCHEMA,
+            )
+
+            out_dir.mkdir(parents=True, exist_ok=True)
+            pq.write_table(table, tmp, compression="zstd")
+
+            conn.execute(
+                text("DELETE FROM raw_events WHERE id = ANY(CAST(:ids AS UUID[]))"),
+                {"ids": list(columns[0])},
+            )
+    except BaseException:
+        # Nothing committed: Postgres stays the source of truth
+        tmp.unlink(missing_ok=True)
+        raise
+
+    os.replace(tmp, path)
+
+    logger.info(f"Archived {len(rows)} raw events: {dataset_id} {day}")
+    return len(rows)
+
+
+# -------------------- READ --------------------
+
+def archived_dataset_ids() -> list[str]:
+    root = archive_root()
+    if not root.exists():
+        return []
+
+    return sorted(
+        p.name.split("=", 1)[1]
+        for p in root.iterdir()
+        if p.is_dir() and p.name.startswith("dataset_id=")
+    )
+
+
+def _archived_days(dataset_id: str, newest_first: bool = True) -> list[Path]:
+    base = archive_root() / f"dataset_id={dataset_id}"
+    if not base.exists():
+        return []
+
+    return sorted(
+        (p for p in base.iterdir() if p.is_dir() and p.name.startswith("day=")),
+        key=lambda p: p.name,
+        reverse=newest_first,
+    )
+
+
+def archived_event_stats(dataset_id: str) -> tuple[int, datetime | None, datetime | None]:
+    """
+    (count, first ingested_at, last ingested_at) of a dataset's archive.
+    """
+    count, first, last = 0, None, None
+
+    for day_dir in _archived_days(dataset_id, newest_first=False):
+        for f in day_dir.glob("*.parquet"):
+            col = pq.read_table(f, columns=["ingested_at"]).column("ingested_at")
+            if not len(col):
+                continue
+
+            bounds = pc.min_max(col)
+            lo, hi = bounds["min"].as_py(), bounds["max"].as_py()
+            count += len(col)
+            first = lo if first is None else min(first, lo)
+            last = hi if last is None else max(last, hi)
+
+    return count, first, last
+
+
+def iter_archived_rows(
+    dataset_id: str,
+    site_id: int | None = None,
+    newest_first: bool = True,
+    before: tuple | None = None,
+    as_text: bool = False,
+):
+    """
+    Archived (ingested_at, id, payload) rows ordered by (ingested_at, id),
+    read one day directory at a time. `before` is a keyset position for
+    newest-first paging. With `as_text` the payload is the stored JSON
+    text instead of a dict.
+    """
+    for day_dir in _archived_days(dataset_id, newest_first):
+        if before is not None and day_dir.name > f"day={before[0].date().isoformat()}":
+            continue
+
+        files = sorted(day_dir.glob("*.parquet"))
+        if not files:
+            continue
+
+        table = pa.concat_tables(
+            pq.read_table(f, columns=["ingested_at", "id", "raw_payload"])
+            for f in files
+        )
+        order = "descending" if newest_first else "ascending"
+        table = table.sort_by([("ingested_at", order), ("id", order)])
+
+        for ts, event_id, raw in zip(
+            table.column("ingested_at").to_pylist(),
+            table.column("id").to_pylist(),
+            table.column("raw_payload").to_pylist(),
+        ):
+            if before is not None and (ts, event_id) >= before:
+                continue
+
+            if site_id is not None and _site_id(json.loads(raw)) != site_id:
+                continue
+
+            yield ts, event_id, raw if as_text else json.loads(raw)
+
+
+def read_archived_rows(
+    dataset_id: str,
+    limit: int | None = None,
+    site_id: int | None = None,
+    newest_first: bool = True,
+    before: tuple | None = None,
+    as_text: bool = False,
+) -> list[tuple]:
+    """
+    Up to `limit` rows of iter_archived_rows().
+    """
+    return list(islice(
+        iter_archived_rows(dataset_id, site_id, newest_first, before, as_text),
+        limit,
+    ))
+
+
+def read_archived_payloads(
+    dataset_id: str,
+    limit: int | None = None,
+    site_id: int | None = None,
+    newest_first: bool = True,
+) -> list[dict]:
+    return [
+        payload
+        for _, _, payload in read_archived_rows(dataset_id, limit, site_id, newest_first)
+    ]
+
+
+def _site_id(payload) -> int | None:
+    try:
+        return int(payload.get("siteId"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _hot_query(
+    dataset_id: str,
+    site_id: int | None,
+    before: tuple | None,
+    as_text: bool,
+    limit: int | None,
+):
+    where = ["dataset_id = :dataset_id"]
+    params = {"dataset_id": dataset_id}
+
+    if site_id is not None:
+        where.append("(raw_payload ->> 'siteId')::int = :site_id")
+        params["site_id"] = site_id
+
+    if before is not None:
+        where.append("(ingested_at, id) < (:before_at, CAST(:before_id AS UUID))")
+        params["before_at"], params["before_id"] = before
+
+    sql = f"""
+        SELECT ingested_at, id::text, raw_payload{'::text' if as_text else ''}
+        FROM raw_events
+        WHERE {' AND '.join(where)}
+        ORDER BY ingested_at DESC, id DESC
+    """
+    if limit is not None:
+        sql += "LIMIT :limit"
+        params["limit"] = limit
+
+    return text(sql), params
+
+
+def fetch_raw_page(
+    conn,
+    dataset_id: str,
+    limit: int,
+    site_id: int | None = None,
+    before: tuple | None = None,
+    as_text: bool = False,
+) -> tuple[list, tuple | None]:
+    """
+    Newest-first raw payloads for a dataset: hot rows from raw_events,
+    topped up from the Parquet archive when fewer than `limit` are hot.
+
+    Pages by keyset on (ingested_at, id). Returns the payloads and the
+    position of the last row when the page is full (None otherwise).
+    With `as_text` payloads are returned as JSON text rendered by
+    Postgres, ready to forward without decoding.
+    """
+    query, params = _hot_query(dataset_id, site_id, before, as_text, limit)
+    page = [tuple(r) for r in conn.execute(query, params).fetchall()]
+
+    if len(page) < limit:
+        # Archived events are all older than the hot ones
+        page.extend(read_archived_rows(
+            dataset_id,
+            limit=limit - len(page),
+            site_id=site_id,
+            before=before if not page else page[-1][:2],
+            as_text=as_text,
+        ))
+
+    last = page[-1][:2] if len(page) == limit else None
+    return [payload for _, _, payload in page], last
+
+
+async def fetch_raw_page_async(
+    conn,
+    dataset_id: str,
+    limit: int,
+    site_id: int | None = None,
+    before: tuple | None = None,
+    as_text: bool = False,
+) -> tuple[list, tuple | None]:
+    """
+    fetch_raw_page() on an AsyncConnection; the archive is read in a
+    worker thread.
+    """
+    query, params = _hot_query(dataset_id, site_id, before, as_text, limit)
+    page = [tuple(r) for r in (await conn.execute(query, params)).fetchall()]
+
+    if len(page) < limit:
+        page.extend(await asyncio.to_thread(
+            read_archived_rows,
+            dataset_id,
+            limit=limit - len(page),
+            site_id=site_id,
+            before=before if not page else page[-1][:2],
+            as_text=as_text,
+        ))
+
+    last = page[-1][:2] if len(page) == limit else None
+    return [payload for _, _, payload in page], last
+
+
+async def iter_raw_payloads(
+    dataset_id: str,
+    site_id: int | None = None,
+    before: tuple | None = None,
+    limit: int | None = None,
+    as_text: bool = False,
+):
+    """
+    Newest-first raw payloads for a dataset without a page size: hot rows
+    through a server-side cursor, then the archive a day at a time.
+    Memory stays bounded by STREAM_BATCH_ROWS and one archived day.
+    """
+    query, params = _hot_query(dataset_id, site_id, before, as_text, limit)
+    query = query.execution_options(yield_per=STREAM_BATCH_ROWS)
+
+    count = 0
+    last = before
+
+    async with async_engine.connect() as conn:
+        async for ingested_at, event_id, payload in await conn.stream(query, params):
+            yield payload
+            count += 1
+            last = (ingested_at, event_id)
+
+    if limit is not None and count >= limit:
+        return
+
+    archived = islice(
+        iter_archived_rows(dataset_id, site_id, before=last, as_text=as_text),
+        None if limit is None else limit - count,
+    )
+    while batch := await asyncio.to_thread(list, islice(archived, STREAM_BATCH_ROWS)):
+        for _, _, payload in batch:
+            yield payload
+
+
+if __name__ == "__main__":
+    archive_raw_events()
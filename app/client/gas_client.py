@@ -1,7 +1,8 @@
 import pandas as pd
 from datetime import datetime, timedelta, timezone
-from sqlalchemy import text
 from app.db.connection import engine
+from app.archive.observations import reaches_cold, read_cold_history, stitch_history
+from gas_client.copy_reader import copy_observations
 
 
 def get_history(
@@ -28,25 +29,13 @@ def get_history(
         start_dt = datetime.fromisoformat(start).replace(tzinfo=timezone.utc)
         end_dt = datetime.fromisoformat(end).replace(tzinfo=timezone.utc)
 
-    query = text("""
-        SELECT
-            observation_time,
-            value
-        FROM data_observations
-        WHERE series_id = :series_id
-          AND observation_time BETWEEN :start_dt AND :end_dt
-        ORDER BY observation_time
-    """)
-
-    df = pd.read_sql(
-        query,
-        engine,
-        params={
-            "series_id": series_id,
-            "start_dt": start_dt,
-            "end_dt": end_dt,
-        },
-    )
-
-    df.set_index("observation_time", inplace=True)
+    # Binary COPY straight into NumPy columns (see gas_client.copy_reader)
+    rows = copy_observations(engine, [series_id], start_dt, end_dt)
+    df = rows[["observation_time", "value"]].set_index("observation_time")
+
+    # Older months may live in the Parquet cold tier
+    if reaches_cold(start_dt):
+        cold = read_cold_history([series_id], start_dt, end_dt)
+        df = stitch_history(cold, df)
+
     return df
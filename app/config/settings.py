@@ -5,6 +5,9 @@ from sqlalchemy.engine import URL
 
 load_dotenv()
 
+# Relative paths that several processes must agree on resolve from here
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 class Settings:
     DB_HOST = os.getenv("POSTGRES_HOST")
     DB_PORT = int(os.getenv("POSTGRES_PORT", 5432))
@@ -13,9 +16,43 @@ class Settings:
     DB_PASSWORD = os.getenv("POSTGRES_PASSWORD")
 
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+    # Connection pools: sync engine (ingestion, scheduler, clients) and
+    # async engine (read API)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    ASYNC_DB_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", 20))
+    ASYNC_DB_MAX_OVERFLOW = int(os.getenv("ASYNC_DB_MAX_OVERFLOW", 20))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
     
     GIE_API_KEY = os.getenv("GIE_API_KEY")  
 
+    # INSTANTANEOUS_FLOW poller (see app.ingestion.instantaneous_poller)
+    INSTANT_FLOW_POLL_SECONDS = int(os.getenv("INSTANT_FLOW_POLL_SECONDS", 120))
+
+    # data_observations partitioning
+    OBS_PARTITION_MONTHS_AHEAD = int(os.getenv("OBS_PARTITION_MONTHS_AHEAD", 3))
+    OBS_RETENTION_MONTHS = int(os.getenv("OBS_RETENTION_MONTHS", 0))   # 0 = keep forever
+    OBS_RETENTION_DROP = os.getenv("OBS_RETENTION_DROP", "false").lower() == "true"
+
+    # Local Parquet archive
+    ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+    RAW_ARCHIVE_AFTER_DAYS = int(os.getenv("RAW_ARCHIVE_AFTER_DAYS", 30))
+    OBS_COLD_AFTER_MONTHS = int(os.getenv("OBS_COLD_AFTER_MONTHS", 0))   # 0 = disabled
+
+    # Last value per series, shared by API workers and ingestion processes
+    # whatever their working directory (see app.db.latest)
+    LATEST_SNAPSHOT_PATH = os.path.join(
+        PROJECT_ROOT,
+        os.getenv("LATEST_SNAPSHOT_PATH", os.path.join(ARCHIVE_DIR, "latest.json")),
+    )
+
+    # API response cache
+    RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 300))   # seconds, 0 = disabled
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 1000))
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 256 * 2**20))   # per worker
+    RESPONSE_CACHE_VERSION_TTL = float(os.getenv("RESPONSE_CACHE_VERSION_TTL", 2))   # seconds
+
 
     @property
     def database_url(self) -> str:
@@ -28,4 +65,8 @@ class Settings:
             database=self.DB_NAME,
         )
 
+    @property
+    def async_database_url(self) -> str:
+        return self.database_url.set(drivername="postgresql+asyncpg")
+
 settings = Settings()
@@ -1,4 +1,5 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -8,8 +9,9 @@ from app.utils.logger import logger
 engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
 )
 
 SessionLocal = sessionmaker(
@@ -18,6 +20,22 @@ SessionLocal = sessionmaker(
     autocommit=False,
 )
 
+# Read API: asyncpg, so slow queries wait on the event loop instead of
+# holding a threadpool worker
+async_engine = create_async_engine(
+    settings.async_database_url,
+    pool_pre_ping=True,
+    pool_size=settings.ASYNC_DB_POOL_SIZE,
+    max_overflow=settings.ASYNC_DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 def get_db_session():
     try:
         db = SessionLocal()
@@ -27,3 +45,14 @@ def get_db_session():
         raise
     finally:
         db.close()
+
+
+async def get_async_db_session():
+    db = AsyncSessionLocal()
+    try:
+        yield db
+    except SQLAlchemyError as e:
+        logger.error(f"Database session error: {e}")
+        raise
+    finally:
+        await db.close()
@@ -1,10 +1,12 @@
 from app.db.connection import engine
 from app.db.models import Base
+from app.db.partitions import ensure_partitions
 from app.utils.logger import logger
 
 def init_database():
     logger.info("Creating database tables if not exist...")
     Base.metadata.create_all(bind=engine)
+    ensure_partitions()
     logger.info("Database schema ready.")
 
 if __name__ == "__main__":
@@ -0,0 +1,267 @@
+"""
+Integer surrogate keys for data_observations.
+
+data_observations stores meta_series.series_key (INTEGER) instead of the
+text series_id, and quality_flags.flag_id (SMALLINT) instead of the free
+text quality flag. The text values stay in meta_series / quality_flags so
+the API and gas_client keep speaking series_id.
+
+The same rewrite converts a TIMESTAMPTZ observation_time (tables created
+from older models) to naive UTC TIMESTAMP, which the rollups rely on.
+
+Run with:  python -m app.db.keys migrate
+"""
+import argparse
+import math
+
+from sqlalchemy import text
+
+from app.db.connection import engine
+from app.db.partitions import (
+    PARENT_TABLE,
+    create_partition,
+    is_partitioned,
+    list_partitions,
+    partition_name,
+)
+from app.utils.logger import logger
+
+
+NEW_TABLE = f"{PARENT_TABLE}_new"
+
+# Stored for observations that arrive without a quality flag
+UNKNOWN_FLAG = "UNKNOWN"
+
+# Per-process lookup caches (keys never change once assigned)
+_series_keys: dict[str, int] = {}
+_flag_ids: dict[str, int] = {}
+
+
+# -------------------- LOOKUPS --------------------
+
+def normalize_flag(flag) -> str:
+    if flag is None:
+        return UNKNOWN_FLAG
+    if isinstance(flag, float) and math.isnan(flag):
+        return UNKNOWN_FLAG
+    return str(flag)
+
+
+def resolve_series_keys(conn, series_ids) -> dict[str, int]:
+    missing = {s for s in series_ids if s not in _series_keys}
+
+    if missing:
+        rows = conn.execute(
+            text("""
+                SELECT series_id, series_key
+                FROM meta_series
+                WHERE series_id = ANY(:ids)
+            """),
+            {"ids": list(missing)},
+        ).fetchall()
+        _series_keys.update({r[0]: r[1] for r in rows})
+
+    unknown = missing - _series_keys.keys()
+    if unknown:
+        raise ValueError(f"Series not registered in meta_series: {sorted(unknown)}")
+
+    return {s: _series_keys[s] for s in series_ids}
+
+
+def resolve_flag_ids(conn, flags) -> dict[str, int]:
+    flags = set(flags)
+    missing = flags - _flag_ids.keys()
+
+    if missing:
+        conn.execute(
+            text("""
+                INSERT INTO quality_flags (flag)
+                SELECT unnest(CAST(:flags AS TEXT[]))
+                ON CONFLICT (flag) DO NOTHING
+            """),
+            {"flags": sorted(missing)},
+        )
+        rows = conn.execute(
+            text("SELECT flag, flag_id FROM quality_flags WHERE flag = ANY(:flags)"),
+            {"flags": sorted(missing)},
+        ).fetchall()
+        _flag_ids.update({r[0]: r[1] for r in rows})
+
+    return {f: _flag_ids[f] for f in flags}
+
+
+# -------------------- MIGRATION --------------------
+
+def _column_type(conn, table: str, column: str) -> str:
+    return conn.execute(
+        text("""
+            SELECT format_type(atttypid, atttypmod)
+            FROM pg_attribute
+            WHERE attrelid = CAST(:table AS regclass)
+              AND attname = :column
+              AND NOT attisdropped
+        """),
+        {"table": table, "column": column},
+    ).scalar()
+
+
+def migrate_to_integer_keys() -> None:
+    """
+    Rewrite data_observations with integer series keys and flag ids, and
+    observation_time as naive UTC TIMESTAMP.
+
+    Also converts tables that already use integer keys but were created
+    with a TIMESTAMPTZ observation_time (a partition key column cannot be
+    altered in place). Requires the table to be partitioned already
+    (app.db.partitions). Runs in a single transaction: a new partitioned
+    table is filled month by month, then swapped in place of the old one.
+    """
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            raise RuntimeError(
+                f"{PARENT_TABLE} must be partitioned first: "
+                "python -m app.db.partitions migrate"
+            )
+
+        has_keys = bool(_column_type(conn, PARENT_TABLE, "series_key"))
+        obs_type = _column_type(conn, PARENT_TABLE, "observation_time")
+        ing_type = _column_type(conn, PARENT_TABLE, "ingestion_time")
+        naive = obs_type == "timestamp without time zone"
+
+        if has_keys and naive:
+            logger.info(f"{PARENT_TABLE} already uses integer keys. Nothing to do.")
+            return
+
+        logger.info(f"Migrating {PARENT_TABLE} to integer keys and UTC TIMESTAMP...")
+
+        # ---------------- LOOKUP TABLES ----------------
+        if not has_keys:
+            conn.execute(text("""
+                ALTER TABLE meta_series
+                ADD COLUMN IF NOT EXISTS series_key INTEGER
+                GENERATED BY DEFAULT AS IDENTITY
+            """))
+            conn.execute(text("""
+                DO $$
+                BEGIN
+                    IF NOT EXISTS (
+                        SELECT 1 FROM pg_constraint
+                        WHERE conname = 'meta_series_series_key_key'
+                    ) THEN
+                        ALTER TABLE meta_series
+                        ADD CONSTRAINT meta_series_series_key_key UNIQUE (series_key);
+                    END IF;
+                END $$
+            """))
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS quality_flags (
+                    flag_id SMALLINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                    flag TEXT NOT NULL UNIQUE
+                )
+            """))
+            conn.execute(
+                text(f"""
+                    INSERT INTO quality_flags (flag)
+                    SELECT DISTINCT COALESCE(quality_flag, :unknown)
+                    FROM {PARENT_TABLE}
+                    ON CONFLICT (flag) DO NOTHING
+                """),
+                {"unknown": UNKNOWN_FLAG},
+            )
+
+        # ---------------- NEW TABLE ----------------
+        # Fixed-width columns first so rows pack without alignment padding
+        conn.execute(text(f"""
+            CREATE TABLE {NEW_TABLE} (
+                observation_time TIMESTAMP NOT NULL,
+                value DOUBLE PRECISION NOT NULL,
+                series_key INTEGER NOT NULL,
+                quality_flag_id SMALLINT,
+                ingestion_time {ing_type} DEFAULT NOW(),
+                raw_payload JSONB
+            ) PARTITION BY RANGE (observation_time)
+        """))
+
+        # TIMESTAMPTZ values become their UTC wall-clock time
+        observation_time = (
+            "d.observation_time" if naive else "d.observation_time AT TIME ZONE 'UTC'"
+        )
+        if has_keys:
+            source = f"""
+                SELECT {observation_time}, d.value, d.series_key, d.quality_flag_id,
+                       d.ingestion_time, d.raw_payload
+                FROM {{partition}} d
+            """
+        else:
+            source = f"""
+                SELECT {observation_time}, d.value, m.series_key, q.flag_id,
+                       d.ingestion_time, d.raw_payload
+                FROM {{partition}} d
+                JOIN meta_series m ON m.series_id = d.series_id
+                JOIN quality_flags q
+                  ON q.flag = COALESCE(d.quality_flag, :unknown)
+            """
+
+        months = list_partitions(conn)
+
+        for month in months:
+            create_partition(conn, month, table=NEW_TABLE)
+
+            moved = conn.execute(
+                text(f"""
+                    INSERT INTO {NEW_TABLE}
+                        (observation_time, value, series_key, quality_flag_id,
+                         ingestion_time, raw_payload)
+                    {source.format(partition=partition_name(month))}
+                """),
+                {} if has_keys else {"unknown": UNKNOWN_FLAG},
+            ).rowcount
+
+            if moved:
+                logger.info(f"Converted {moved} rows of {partition_name(month)}")
+
+        # ---------------- SWAP ----------------
+        conn.execute(text(f"DROP TABLE {PARENT_TABLE}"))
+        conn.execute(text(f"ALTER TABLE {NEW_TABLE} RENAME TO {PARENT_TABLE}"))
+
+        for month in months:
+            conn.execute(text(f"""
+                ALTER TABLE {partition_name(month, NEW_TABLE)}
+                RENAME TO {partition_name(month)}
+            """))
+
+        # The primary key covers (series_key, observation_time) lookups,
+        # so no separate series/time index is needed.
+        conn.execute(text(f"""
+            ALTER TABLE {PARENT_TABLE}
+            ADD CONSTRAINT {PARENT_TABLE}_pkey
+            PRIMARY KEY (series_key, observation_time)
+        """))
+        conn.execute(text(f"""
+            ALTER TABLE {PARENT_TABLE}
+            ADD FOREIGN KEY (series_key) REFERENCES meta_series(series_key)
+        """))
+        conn.execute(text(f"""
+            ALTER TABLE {PARENT_TABLE}
+            ADD FOREIGN KEY (quality_flag_id) REFERENCES quality_flags(flag_id)
+        """))
+        conn.execute(text(f"""
+            CREATE INDEX idx_data_obs_raw
+            ON {PARENT_TABLE} USING GIN (raw_payload)
+        """))
+
+    with engine.connect() as conn:
+        conn.execute(text(f"ANALYZE {PARENT_TABLE}"))
+        conn.commit()
+
+    logger.info(f"{PARENT_TABLE} now uses integer keys and UTC TIMESTAMP.")
+    if not naive:
+        logger.info("Rebuild the rollups: python -m app.db.rollups rebuild")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["migrate"])
+    args = parser.parse_args()
+
+    migrate_to_integer_keys()
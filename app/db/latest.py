@@ -0,0 +1,214 @@
+"""
+Latest observation of every series, as a snapshot file shared by all API
+workers.
+
+- update_latest(series_ids) : re-read the last row of the given series and
+                              merge it into the snapshot (called once per
+                              load_frame, for the series it changed)
+- rebuild_latest()          : write the snapshot from scratch
+- ensure_latest()           : ... only if there is none yet
+- LatestSnapshot            : per-process reader for /v2/latest
+
+The file is a JSON array sorted by series_id, so /v2/latest can send it
+as is. Writers serialise on a lock file and publish with os.replace, so
+readers only ever see a complete snapshot; they read it again whenever
+its inode, size or mtime changes.
+
+Run with:  python -m app.db.latest rebuild
+"""
+import argparse
+import fcntl
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from sqlalchemy import text
+
+from app.config.settings import settings
+from app.db.connection import engine
+from app.utils.logger import logger
+
+
+LATEST_SQL = """
+    SELECT m.series_id, m.dataset_id, m.unit, d.observation_time, d.value, q.flag AS quality_flag
+    FROM meta_series m
+    CROSS JOIN LATERAL (
+        SELECT observation_time, value, quality_flag_id
+        FROM data_observations
+        WHERE series_key = m.series_key
+        ORDER BY observation_time DESC
+        LIMIT 1
+    ) d
+    LEFT JOIN quality_flags q ON q.flag_id = d.quality_flag_id
+"""
+
+
+def snapshot_path() -> Path:
+    return Path(settings.LATEST_SNAPSHOT_PATH)
+
+
+# -------------------- WRITE --------------------
+
+def fetch_latest(
+    conn, series_ids: list[str] | None = None, dataset_id: str | None = None
+) -> dict[str, dict]:
+    """Snapshot entries (series_id -> entry) read from Postgres."""
+    where = []
+    params = {}
+    if series_ids is not None:
+        where.append("m.series_id = ANY(:series_ids)")
+        params["series_ids"] = list(series_ids)
+    if dataset_id is not None:
+        where.append("m.dataset_id = :dataset_id")
+        params["dataset_id"] = dataset_id
+
+    sql = LATEST_SQL
+    if where:
+        sql += "WHERE " + " AND ".join(where)
+
+    return {
+        r.series_id: {
+            "series_id": r.series_id,
+            "dataset_id": r.dataset_id,
+            "unit": r.unit,
+            "observation_time": r.observation_time.isoformat(),
+            "value": r.value,
+            "quality_flag": r.quality_flag,
+        }
+        for r in conn.execute(text(sql), params)
+    }
+
+
+@contextmanager
+def _locked(path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _write(path: Path, entries: dict[str, dict]) -> None:
+    body = json.dumps([entries[s] for s in sorted(entries)], separators=(",", ":"))
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".")
+    try:
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, "w") as f:
+            f.write(body)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def update_latest(series_ids) -> None:
+    """
+    Refresh the snapshot entries of the given series (a full rebuild when
+    there is no snapshot yet).
+    """
+    series_ids = sorted(set(series_ids))
+    if not series_ids:
+        return
+
+    path = snapshot_path()
+    with _locked(path):
+        if not path.exists():
+            _build(path)
+            return
+
+        with open(path) as f:
+            entries = {e["series_id"]: e for e in json.load(f)}
+        with engine.connect() as conn:
+            entries.update(fetch_latest(conn, series_ids))
+        _write(path, entries)
+
+
+def _build(path: Path) -> int:
+    with engine.connect() as conn:
+        entries = fetch_latest(conn)
+    _write(path, entries)
+
+    logger.info(f"Latest snapshot: {len(entries)} series -> {path}")
+    return len(entries)
+
+
+def ensure_latest() -> None:
+    """Build the snapshot if there is none yet (e.g. on a fresh API host)."""
+    path = snapshot_path()
+    with _locked(path):
+        if not path.exists():
+            _build(path)
+
+
+def rebuild_latest() -> int:
+    path = snapshot_path()
+    with _locked(path):
+        return _build(path)
+
+
+# -------------------- READ --------------------
+
+class LatestSnapshot:
+    """
+    The snapshot as this process last read it: the raw JSON body for
+    whole-snapshot requests, and (parsed on first use) one pre-rendered
+    entry per series for filtered ones.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._stamp = None
+        self.body = b"[]"
+        self.mtime = None
+        self._entries = None
+
+    def refresh(self) -> bool:
+        """Re-read the file if it changed; False when there is none."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+
+        stamp = (st.st_ino, st.st_size, st.st_mtime_ns)
+        if stamp != self._stamp:
+            with open(self.path, "rb") as f:
+                self.body = f.read() or b"[]"
+            self._stamp = stamp
+            self.mtime = st.st_mtime
+            self._entries = None
+        return True
+
+    def entries(self) -> dict[str, tuple[str, bytes]]:
+        """series_id -> (dataset_id, rendered JSON object)."""
+        if self._entries is None:
+            self._entries = {
+                e["series_id"]: (e["dataset_id"], json.dumps(e, separators=(",", ":")).encode())
+                for e in json.loads(self.body)
+            }
+        return self._entries
+
+    def select(self, series_ids: list[str] | None = None, dataset_id: str | None = None) -> bytes:
+        """JSON array of the matching entries, in series_id order."""
+        if series_ids is None and dataset_id is None:
+            return self.body
+
+        entries = self.entries()
+        keys = sorted(set(series_ids)) if series_ids is not None else sorted(entries)
+        parts = [
+            entries[s][1] for s in keys
+            if s in entries and (dataset_id is None or entries[s][0] == dataset_id)
+        ]
+        return b"[" + b",".join(parts) + b"]"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latest-value snapshot")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+
+    rebuild_latest()
@@ -3,9 +3,14 @@ from sqlalchemy import (
     Integer,
     String,
     DateTime,
+    BigInteger,
     Boolean,
     Float,
     ForeignKey,
+    Identity,
+    Index,
+    PrimaryKeyConstraint,
+    SmallInteger,
     Text,
 )
 from sqlalchemy.orm import declarative_base
@@ -25,6 +30,7 @@ class MetaSeries(Base):
     __tablename__ = "meta_series"
 
     series_id = Column(String, primary_key=True)
+    series_key = Column(Integer, Identity(), unique=True, nullable=False)
     dataset_id = Column(String, nullable=False)   # 🔥 should NOT be nullable
     source = Column(String, nullable=False)
     source_type = Column(String, default="NATIONAL_GAS")  # 🔥 add
@@ -39,31 +45,43 @@ class MetaSeries(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class QualityFlag(Base):
+    __tablename__ = "quality_flags"
+
+    flag_id = Column(SmallInteger, Identity(), primary_key=True)
+    flag = Column(Text, nullable=False, unique=True)
+
+
 class DataObservation(Base):
     __tablename__ = "data_observations"
-
-    series_id = Column(
-        String,
-        ForeignKey("meta_series.series_id"),
-        primary_key=True,
-        nullable=False,
+    __table_args__ = (
+        PrimaryKeyConstraint("series_key", "observation_time"),
+        # Monthly partitions are managed by app.db.partitions
+        {"postgresql_partition_by": "RANGE (observation_time)"},
     )
 
-    observation_time = Column(
-        DateTime(timezone=True),
-        primary_key=True,
+    # Fixed-width columns first so rows pack without alignment padding
+    observation_time = Column(DateTime, nullable=False)
+    value = Column(Float, nullable=False)
+
+    series_key = Column(
+        Integer,
+        ForeignKey("meta_series.series_key"),
         nullable=False,
     )
+    quality_flag_id = Column(SmallInteger, ForeignKey("quality_flags.flag_id"))
 
     ingestion_time = Column(DateTime, default=datetime.utcnow)
-    value = Column(Float, nullable=False)
-    quality_flag = Column(String, default="UNKNOWN")
 
     raw_payload = Column(JSONB)  # 🔥 REQUIRED
 
 
 class RawEvent(Base):
     __tablename__ = "raw_events"
+    __table_args__ = (
+        # Keyset paging: newest-first per dataset
+        Index("idx_raw_events_dataset_time", "dataset_id", "ingested_at", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     source = Column(Text, nullable=False)
@@ -87,4 +105,47 @@ class FieldCatalog(Base):
     inferred_type = Column(Text, nullable=False)
     nullable = Column(Boolean, nullable=False)
     example_value = Column(Text)
-    first_seen_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    first_seen_at = Column(DateTime, default=datetime.utcnow)
+
+
+class DatasetRegistry(Base):
+    __tablename__ = "dataset_registry"
+
+    dataset_id = Column(Text, primary_key=True)
+    source = Column(Text)
+    first_ingested_at = Column(DateTime)
+    last_ingested_at = Column(DateTime)
+    raw_event_count = Column(BigInteger, nullable=False, server_default="0")
+    series_count = Column(Integer, nullable=False, server_default="0")
+    field_count = Column(Integer, nullable=False, server_default="0")
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class DatasetVersion(Base):
+    __tablename__ = "dataset_versions"
+
+    dataset_id = Column(Text, primary_key=True)
+    version = Column(Integer, nullable=False, server_default="0")
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class RollupColumns:
+    """Mergeable aggregates of one (series_key, bucket); see app.db.rollups."""
+
+    series_key = Column(Integer, ForeignKey("meta_series.series_key"), primary_key=True)
+    bucket = Column(DateTime, primary_key=True)   # UTC bucket start
+    n = Column(BigInteger, nullable=False)
+    total = Column(Float, nullable=False)
+    min_value = Column(Float, nullable=False)
+    max_value = Column(Float, nullable=False)
+    first_time = Column(DateTime, nullable=False)
+    first_value = Column(Float, nullable=False)
+    last_time = Column(DateTime, nullable=False)
+    last_value = Column(Float, nullable=False)
+
+
+class DataRollupHourly(RollupColumns, Base):
+    __tablename__ = "data_rollup_hourly"
+
+
+class DataRollupGasday(RollupColumns, Base):
+    __tablename__ = "data_rollup_gasday"
@@ -0,0 +1,73 @@
+"""
+Commit notifications for new observations (Postgres LISTEN/NOTIFY).
+
+upsert_observations() calls notify_observations() inside its transaction,
+so listeners hear about a batch only once it is committed. A payload names
+the batch's ingestion_time and, per series, the first and last
+observation_time written; listeners read the points themselves (NOTIFY
+payloads are limited to 8000 bytes), e.g. app.api.v2.stream.
+"""
+import json
+
+from sqlalchemy import text
+
+from app.utils.logger import logger
+
+
+OBSERVATIONS_CHANNEL = "observations"
+
+# Postgres rejects payloads of 8000 bytes or more (and the transaction with them)
+MAX_PAYLOAD_BYTES = 7900
+
+
+def _payloads(ingestion_time: str, series: list) -> list[str]:
+    """Series entries packed into as few payloads as fit the byte limit."""
+    def render(entries):
+        return json.dumps({"t": ingestion_time, "series": entries}, separators=(",", ":"))
+
+    budget = MAX_PAYLOAD_BYTES - len(render([]).encode())
+    payloads = []
+    batch, size = [], 0
+
+    for entry in series:
+        n = len(json.dumps(entry, separators=(",", ":")).encode()) + 1   # + comma
+        if n > budget:
+            logger.warning(f"NOTIFY {OBSERVATIONS_CHANNEL}: {entry[0][:80]} too long to announce")
+            continue
+        if size + n > budget:
+            payloads.append(render(batch))
+            batch, size = [], 0
+        batch.append(entry)
+        size += n
+
+    if batch:
+        payloads.append(render(batch))
+    return payloads
+
+
+def notify_observations(conn, series_keys: dict[str, int], written, ingestion_time) -> None:
+    """
+    series_keys: series_id -> series_key; written: (series_key,
+    observation_time) rows returned by the upsert.
+    """
+    ids = {key: sid for sid, key in series_keys.items()}
+
+    ranges = {}
+    for key, ts in written:
+        first, last = ranges.get(key, (ts, ts))
+        ranges[key] = (min(first, ts), max(last, ts))
+    if not ranges:
+        return
+
+    series = [
+        [ids[key], first.isoformat(), last.isoformat()]
+        for key, (first, last) in sorted(ranges.items())
+    ]
+
+    conn.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        [
+            {"channel": OBSERVATIONS_CHANNEL, "payload": p}
+            for p in _payloads(ingestion_time.isoformat(), series)
+        ],
+    )
@@ -0,0 +1,371 @@
+"""
+Monthly range partitioning for data_observations.
+
+The parent table is partitioned by RANGE (observation_time) with one child
+table per calendar month (UTC), named data_observations_pYYYYMM.
+
+- ensure_partitions()      : pre-create partitions for the coming months
+- ensure_partitions_for()  : make sure a batch of timestamps has partitions
+                             (known months are cached per process; see
+                             forget_partitions / is_missing_partition)
+- apply_retention()        : detach (and optionally drop) expired months
+- migrate_to_partitioned() : one-off conversion of a plain heap table
+
+Run with:  python -m app.db.partitions [maintain|migrate]
+"""
+import argparse
+from datetime import date, datetime, timezone
+from typing import Iterable
+
+from psycopg2 import errors
+from sqlalchemy import text
+
+from app.config.settings import settings
+from app.db.connection import engine
+from app.db.rollups import delete_rollups_before
+from app.db.versions import bump_all_versions
+from app.utils.logger import logger
+
+
+PARENT_TABLE = "data_observations"
+LEGACY_TABLE = f"{PARENT_TABLE}_legacy"
+
+# Months we already know have a partition (per process)
+_known_partitions: set[date] = set()
+
+
+# -------------------- MONTH HELPERS --------------------
+
+def month_start(value) -> date:
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return date(value.year, value.month, 1)
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, n: int) -> date:
+    idx = month.year * 12 + (month.month - 1) + n
+    return date(idx // 12, idx % 12 + 1, 1)
+
+
+def partition_name(month: date, table: str = PARENT_TABLE) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def _bound(month: date) -> str:
+    # Explicit UTC offset: valid for both TIMESTAMP and TIMESTAMPTZ columns
+    return f"{month:%Y-%m-%d} 00:00:00+00"
+
+
+# -------------------- INTROSPECTION --------------------
+
+def is_partitioned(conn) -> bool:
+    return bool(conn.execute(
+        text("""
+            SELECT EXISTS (
+                SELECT 1
+                FROM pg_partitioned_table pt
+                JOIN pg_class c ON c.oid = pt.partrelid
+                WHERE c.relname = :table
+                  AND pg_table_is_visible(c.oid)
+            )
+        """),
+        {"table": PARENT_TABLE},
+    ).scalar())
+
+
+def list_partitions(conn) -> list[date]:
+    """
+    Months that currently have an attached partition, oldest first.
+    """
+    rows = conn.execute(
+        text("""
+            SELECT child.relname
+            FROM pg_inherits i
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            JOIN pg_class child ON child.oid = i.inhrelid
+            WHERE parent.relname = :table
+              AND pg_table_is_visible(parent.oid)
+        """),
+        {"table": PARENT_TABLE},
+    ).fetchall()
+
+    prefix = f"{PARENT_TABLE}_p"
+    months = []
+    for (name,) in rows:
+        if not name.startswith(prefix):
+            continue
+        try:
+            months.append(datetime.strptime(name[len(prefix):], "%Y%m").date())
+        except ValueError:
+            continue
+
+    return sorted(months)
+
+
+# -------------------- CREATION --------------------
+
+def create_partition(conn, month: date, table: str = PARENT_TABLE) -> None:
+    name = partition_name(month, table)
+
+    # A plain table under the partition's name (detached before detached
+    # tables were renamed) would turn the CREATE below into a no-op
+    stray = conn.execute(
+        text("""
+            SELECT NOT EXISTS (SELECT 1 FROM pg_inherits WHERE inhrelid = c.oid)
+            FROM pg_class c
+            WHERE c.relname = :name AND pg_table_is_visible(c.oid)
+        """),
+        {"name": name},
+    ).scalar()
+    if stray:
+        conn.execute(text(f"ALTER TABLE {name} RENAME TO {name}_detached"))
+        logger.warning(f"Renamed detached table {name} to {name}_detached")
+
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {name}
+        PARTITION OF {table}
+        FOR VALUES FROM ('{_bound(month)}') TO ('{_bound(add_months(month, 1))}')
+    """))
+
+
+def ensure_partitions(
+    months_ahead: int | None = None,
+    months_back: int = 0,
+) -> list[date]:
+    """
+    Create partitions from (current month - months_back) up to
+    (current month + months_ahead). Existing partitions are left alone.
+    """
+    if months_ahead is None:
+        months_ahead = settings.OBS_PARTITION_MONTHS_AHEAD
+
+    current = month_start(datetime.now(timezone.utc))
+    wanted = [add_months(current, n) for n in range(-months_back, months_ahead + 1)]
+
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            logger.warning(
+                f"{PARENT_TABLE} is not partitioned yet. "
+                "Run `python -m app.db.partitions migrate` first."
+            )
+            return []
+
+        existing = set(list_partitions(conn))
+        created = [m for m in wanted if m not in existing]
+
+        for month in created:
+            create_partition(conn, month)
+
+    _known_partitions.update(wanted)
+
+    if created:
+        logger.info(f"Created partitions: {[partition_name(m) for m in created]}")
+
+    return created
+
+
+def ensure_partitions_for(times: Iterable) -> None:
+    """
+    Make sure every month touched by a load batch has a partition.
+
+    Normally the scheduler pre-creates partitions, so this only issues DDL
+    for backfills into months that were never seen before.
+    """
+    months = {month_start(t) for t in times if t is not None}
+    missing = months - _known_partitions
+
+    if not missing:
+        return
+
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            return
+
+        existing = set(list_partitions(conn))
+        for month in sorted(missing - existing):
+            create_partition(conn, month)
+            logger.info(f"Created partition {partition_name(month)} for backfill")
+
+    _known_partitions.update(missing)
+
+
+def forget_partitions() -> None:
+    """
+    Drop the per-process cache of known months, e.g. after another process
+    detached one (retention, cold export) and an insert found it missing.
+    """
+    _known_partitions.clear()
+
+
+def is_missing_partition(exc) -> bool:
+    """True for the error of an insert into a month with no partition."""
+    orig = getattr(exc, "orig", exc)
+    return isinstance(orig, errors.CheckViolation) and "no partition of relation" in str(orig)
+
+
+# -------------------- RETENTION --------------------
+
+def detach_partition(conn, month: date, drop: bool = False) -> str:
+    """
+    Detach one month; returns the name of the table it leaves behind.
+    A kept table is renamed to {partition}_detached so the month's
+    partition name is free again for create_partition (e.g. a backfill).
+    """
+    name = partition_name(month)
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+
+    if drop:
+        conn.execute(text(f"DROP TABLE {name}"))
+    else:
+        kept = f"{name}_detached"
+        conn.execute(text(f"ALTER TABLE {name} RENAME TO {kept}"))
+        name = kept
+
+    _known_partitions.discard(month)
+    return name
+
+
+def apply_retention(
+    retain_months: int | None = None,
+    drop: bool | None = None,
+) -> list[str]:
+    """
+    Detach partitions that lie entirely before the retention window.
+    Detached tables are dropped when drop=True, otherwise kept as plain
+    tables ({partition}_detached) so they can be archived or re-attached.
+    """
+    if retain_months is None:
+        retain_months = settings.OBS_RETENTION_MONTHS
+    if drop is None:
+        drop = settings.OBS_RETENTION_DROP
+
+    if not retain_months or retain_months <= 0:
+        return []
+
+    cutoff = add_months(month_start(datetime.now(timezone.utc)), -retain_months)
+    detached = []
+
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            return []
+
+        for month in list_partitions(conn):
+            if add_months(month, 1) > cutoff:
+                continue
+
+            detached.append(detach_partition(conn, month, drop=drop))
+
+        if detached:
+            delete_rollups_before(conn, cutoff)
+            bump_all_versions(conn)
+
+    if detached:
+        action = "Dropped" if drop else "Detached"
+        logger.info(f"{action} expired partitions: {detached}")
+
+    return detached
+
+
+def maintain_partitions() -> None:
+    ensure_partitions()
+    apply_retention()
+
+
+# -------------------- MIGRATION --------------------
+
+def migrate_to_partitioned(keep_legacy: bool = False) -> None:
+    """
+    Convert an existing, non-partitioned data_observations table.
+
+    Runs in a single transaction: the old table is renamed, a partitioned
+    parent with the same columns is created, rows are copied month by month
+    and the old table is dropped (or kept as data_observations_legacy).
+    """
+    with engine.begin() as conn:
+        if is_partitioned(conn):
+            logger.info(f"{PARENT_TABLE} is already partitioned. Nothing to do.")
+            return
+
+        logger.info(f"Migrating {PARENT_TABLE} to monthly partitions...")
+
+        conn.execute(text(f"ALTER TABLE {PARENT_TABLE} RENAME TO {LEGACY_TABLE}"))
+        conn.execute(text(f"""
+            ALTER TABLE {LEGACY_TABLE}
+            RENAME CONSTRAINT {PARENT_TABLE}_pkey TO {LEGACY_TABLE}_pkey
+        """))
+        conn.execute(text(f"""
+            ALTER TABLE {LEGACY_TABLE}
+            DROP CONSTRAINT IF EXISTS {PARENT_TABLE}_series_id_fkey
+        """))
+        conn.execute(text("DROP INDEX IF EXISTS idx_data_obs_series_time"))
+        conn.execute(text("DROP INDEX IF EXISTS idx_data_obs_raw"))
+
+        conn.execute(text(f"""
+            CREATE TABLE {PARENT_TABLE}
+            (LIKE {LEGACY_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+            PARTITION BY RANGE (observation_time)
+        """))
+        conn.execute(text(f"""
+            ALTER TABLE {PARENT_TABLE}
+            ADD PRIMARY KEY (series_id, observation_time)
+        """))
+        conn.execute(text(f"""
+            ALTER TABLE {PARENT_TABLE}
+            ADD FOREIGN KEY (series_id) REFERENCES meta_series(series_id)
+        """))
+        conn.execute(text(f"""
+            CREATE INDEX idx_data_obs_series_time
+            ON {PARENT_TABLE}(series_id, observation_time)
+        """))
+        conn.execute(text(f"""
+            CREATE INDEX idx_data_obs_raw
+            ON {PARENT_TABLE} USING GIN (raw_payload)
+        """))
+
+        lo, hi = conn.execute(text(f"""
+            SELECT MIN(observation_time), MAX(observation_time)
+            FROM {LEGACY_TABLE}
+        """)).fetchone()
+
+        current = month_start(datetime.now(timezone.utc))
+        first = month_start(lo) if lo else current
+        last = max(month_start(hi) if hi else current,
+                   add_months(current, settings.OBS_PARTITION_MONTHS_AHEAD))
+
+        month = first
+        while month <= last:
+            create_partition(conn, month)
+
+            moved = conn.execute(
+                text(f"""
+                    INSERT INTO {PARENT_TABLE}
+                    SELECT * FROM {LEGACY_TABLE}
+                    WHERE observation_time >= :lo AND observation_time < :hi
+                """),
+                {"lo": _bound(month), "hi": _bound(add_months(month, 1))},
+            ).rowcount
+
+            if moved:
+                logger.info(f"Copied {moved} rows into {partition_name(month)}")
+
+            _known_partitions.add(month)
+            month = add_months(month, 1)
+
+        if not keep_legacy:
+            conn.execute(text(f"DROP TABLE {LEGACY_TABLE}"))
+
+    logger.info(f"{PARENT_TABLE} is now partitioned by month.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["maintain", "migrate"])
+    parser.add_argument("--keep-legacy", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        migrate_to_partitioned(keep_legacy=args.keep_legacy)
+    else:
+        maintain_partitions()
@@ -0,0 +1,141 @@
+"""
+Dataset registry: one small row per dataset, maintained by ingestion.
+
+- record_raw_events()      : count freshly ingested raw events
+- refresh_dataset_counts() : recount series / discovered fields
+- rebuild_registry()       : one-off backfill from raw_events + archive
+
+Discovery endpoints read this table instead of scanning raw_events.
+Archiving raw events does not change the registry: counts are totals
+ingested, wherever the events live now.
+
+Run with:  python -m app.db.registry rebuild
+"""
+import argparse
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.archive.raw_events import archived_dataset_ids, archived_event_stats
+from app.db.connection import engine
+from app.db.versions import bump_dataset_versions
+from app.utils.logger import logger
+
+
+def record_raw_events(
+    conn,
+    dataset_id: str,
+    source: str | None,
+    count: int,
+    first_at: datetime | None = None,
+    last_at: datetime | None = None,
+) -> None:
+    """
+    Add `count` raw events ingested between first_at and last_at
+    (default: now) to the dataset's row.
+    """
+    if count <= 0:
+        return
+
+    conn.execute(
+        text("""
+            INSERT INTO dataset_registry AS r
+                (dataset_id, source, first_ingested_at, last_ingested_at,
+                 raw_event_count, updated_at)
+            VALUES (
+                :dataset_id, :source,
+                COALESCE(CAST(:first_at AS TIMESTAMP), NOW()),
+                COALESCE(CAST(:last_at AS TIMESTAMP), NOW()),
+                :count, NOW()
+            )
+            ON CONFLICT (dataset_id) DO UPDATE SET
+                source = COALESCE(EXCLUDED.source, r.source),
+                first_ingested_at = LEAST(r.first_ingested_at, EXCLUDED.first_ingested_at),
+                last_ingested_at = GREATEST(r.last_ingested_at, EXCLUDED.last_ingested_at),
+                raw_event_count = r.raw_event_count + EXCLUDED.raw_event_count,
+                updated_at = NOW()
+        """),
+        {
+            "dataset_id": dataset_id,
+            "source": source,
+            "first_at": first_at,
+            "last_at": last_at,
+            "count": count,
+        },
+    )
+
+
+def refresh_dataset_counts(conn, dataset_ids) -> None:
+    """
+    Recount registered series (meta_series) and discovered fields
+    (field_catalog); both lookups are indexed and small.
+    """
+    ids = sorted({d for d in dataset_ids if d})
+    if not ids:
+        return
+
+    conn.execute(
+        text("""
+            INSERT INTO dataset_registry AS r
+                (dataset_id, series_count, field_count, updated_at)
+            SELECT
+                d.dataset_id,
+                (SELECT count(*) FROM meta_series m WHERE m.dataset_id = d.dataset_id),
+                (SELECT count(*) FROM field_catalog f WHERE f.dataset_id = d.dataset_id),
+                NOW()
+            FROM unnest(CAST(:ids AS TEXT[])) AS d(dataset_id)
+            ON CONFLICT (dataset_id) DO UPDATE SET
+                series_count = EXCLUDED.series_count,
+                field_count = EXCLUDED.field_count,
+                updated_at = NOW()
+        """),
+        {"ids": ids},
+    )
+
+
+def rebuild_registry() -> int:
+    """
+    Recompute every row from raw_events and the Parquet archive.
+    Full scan: run once after deploying, not on a schedule.
+    """
+    with engine.begin() as conn:
+        hot = {
+            r.dataset_id: r
+            for r in conn.execute(text("""
+                SELECT dataset_id, max(source) AS source, count(*) AS n,
+                       min(ingested_at) AS first_at, max(ingested_at) AS last_at
+                FROM raw_events
+                GROUP BY dataset_id
+            """)).fetchall()
+        }
+
+        dataset_ids = set(hot) | set(archived_dataset_ids())
+
+        conn.execute(text("DELETE FROM dataset_registry"))
+
+        for dataset_id in sorted(dataset_ids):
+            count, first, last = archived_event_stats(dataset_id)
+            source = None
+
+            if dataset_id in hot:
+                h = hot[dataset_id]
+                source = h.source
+                count += h.n
+                first = h.first_at if first is None else min(first, h.first_at)
+                last = h.last_at if last is None else max(last, h.last_at)
+
+            record_raw_events(conn, dataset_id, source, count, first, last)
+
+        refresh_dataset_counts(conn, dataset_ids)
+        bump_dataset_versions(conn, dataset_ids)
+
+    logger.info(f"Dataset registry rebuilt: {len(dataset_ids)} datasets")
+    return len(dataset_ids)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dataset registry")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+
+    rebuild_registry()
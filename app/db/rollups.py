@@ -0,0 +1,145 @@
+"""
+Hourly and gas-day rollups of data_observations.
+
+Each rollup row holds mergeable aggregates for one (series_key, bucket):
+count, sum, min, max and the first / last value with their times, so
+coarser buckets (6h, 1d, 1w, ...) are answered by re-aggregating rollup
+rows instead of raw points.
+
+- refresh_rollups() : recompute the buckets touched by an upsert batch
+- rebuild_rollups() : one-off backfill from all hot rows
+- delete_rollups_before() : keep rollups in line with partition retention
+
+Buckets are recomputed from raw rows (not patched with deltas), so
+upserts that overwrite a value stay exact.
+
+Run with:  python -m app.db.rollups rebuild
+"""
+import argparse
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.db.connection import engine
+from app.utils.logger import logger
+
+
+GAS_DAY_TZ = "Europe/London"
+
+
+def gas_day_start_sql(column: str, days: int = 0) -> str:
+    """
+    UTC start of the gas day (05:00-05:00 Europe/London) containing a
+    naive UTC timestamp column; `days` shifts to a later gas day.
+    """
+    day = f"((({column}) AT TIME ZONE 'UTC') AT TIME ZONE '{GAS_DAY_TZ}' - INTERVAL '5 hours')::date"
+    if days:
+        day = f"({day} + {days})"
+    return f"(({day} + TIME '05:00') AT TIME ZONE '{GAS_DAY_TZ}') AT TIME ZONE 'UTC'"
+
+
+Rollup = namedtuple("Rollup", "table bucket bucket_end")
+
+ROLLUPS = {
+    "hourly": Rollup(
+        "data_rollup_hourly",
+        lambda col: f"date_trunc('hour', {col})",
+        lambda col: f"date_trunc('hour', {col}) + INTERVAL '1 hour'",
+    ),
+    "gasday": Rollup(
+        "data_rollup_gasday",
+        lambda col: gas_day_start_sql(col),
+        lambda col: gas_day_start_sql(col, days=1),
+    ),
+}
+
+# Per-bucket aggregates of raw rows, in rollup column order
+ROLLUP_AGGREGATES = """
+    count(*),
+    sum(d.value),
+    min(d.value),
+    max(d.value),
+    min(d.observation_time),
+    (array_agg(d.value ORDER BY d.observation_time))[1],
+    max(d.observation_time),
+    (array_agg(d.value ORDER BY d.observation_time DESC))[1]
+"""
+
+ROLLUP_COLUMNS = (
+    "n, total, min_value, max_value, first_time, first_value, last_time, last_value"
+)
+
+_UPSERT = """
+    ON CONFLICT (series_key, bucket) DO UPDATE SET
+        n = EXCLUDED.n,
+        total = EXCLUDED.total,
+        min_value = EXCLUDED.min_value,
+        max_value = EXCLUDED.max_value,
+        first_time = EXCLUDED.first_time,
+        first_value = EXCLUDED.first_value,
+        last_time = EXCLUDED.last_time,
+        last_value = EXCLUDED.last_value
+"""
+
+
+def refresh_rollups(conn, series_keys: list[int], times: list[datetime]) -> None:
+    """
+    Recompute every rollup bucket containing one of the written
+    (series_key, observation_time) pairs, inside the caller's transaction.
+    """
+    if not series_keys:
+        return
+
+    for rollup in ROLLUPS.values():
+        conn.execute(
+            text(f"""
+                INSERT INTO {rollup.table} (series_key, bucket, {ROLLUP_COLUMNS})
+                SELECT t.series_key, t.bucket, {ROLLUP_AGGREGATES}
+                FROM (
+                    SELECT DISTINCT
+                        u.series_key,
+                        {rollup.bucket("u.t")} AS bucket,
+                        {rollup.bucket_end("u.t")} AS bucket_end
+                    FROM unnest(CAST(:keys AS INTEGER[]), CAST(:times AS TIMESTAMP[]))
+                        AS u(series_key, t)
+                ) t
+                JOIN data_observations d
+                  ON d.series_key = t.series_key
+                 AND d.observation_time >= t.bucket
+                 AND d.observation_time < t.bucket_end
+                GROUP BY t.series_key, t.bucket
+                {_UPSERT}
+            """),
+            {"keys": series_keys, "times": times},
+        )
+
+
+def delete_rollups_before(conn, cutoff: datetime) -> None:
+    for rollup in ROLLUPS.values():
+        conn.execute(text(f"DELETE FROM {rollup.table} WHERE bucket < :cutoff"), {"cutoff": cutoff})
+
+
+def rebuild_rollups() -> None:
+    """
+    Recompute all rollups from data_observations (full scan: run once
+    after deploying, or after loading data outside upsert_observations).
+    """
+    with engine.begin() as conn:
+        for rollup in ROLLUPS.values():
+            conn.execute(text(f"TRUNCATE {rollup.table}"))
+            result = conn.execute(text(f"""
+                INSERT INTO {rollup.table} (series_key, bucket, {ROLLUP_COLUMNS})
+                SELECT d.series_key, {rollup.bucket("d.observation_time")}, {ROLLUP_AGGREGATES}
+                FROM data_observations d
+                GROUP BY 1, 2
+            """))
+            logger.info(f"Rebuilt {rollup.table}: {result.rowcount} buckets")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Observation rollups")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+
+    rebuild_rollups()
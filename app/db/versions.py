@@ -0,0 +1,64 @@
+"""
+Per-dataset version counters.
+
+Every write path bumps the version of the datasets it touched inside its
+own transaction, so readers (the API response cache) can tell whether a
+cached result is still current with one lookup of this small table.
+"""
+from sqlalchemy import text
+
+
+def bump_dataset_versions(conn, dataset_ids) -> None:
+    ids = sorted({d for d in dataset_ids if d})
+    if not ids:
+        return
+
+    conn.execute(
+        text("""
+            INSERT INTO dataset_versions (dataset_id, version, updated_at)
+            SELECT dataset_id, 1, now()
+            FROM unnest(CAST(:ids AS TEXT[])) AS dataset_id
+            ON CONFLICT (dataset_id) DO UPDATE
+            SET version = dataset_versions.version + 1,
+                updated_at = now()
+        """),
+        {"ids": ids},
+    )
+
+
+def bump_series_versions(conn, series_ids) -> list[str]:
+    """
+    Bump the datasets owning the given series; returns their ids.
+    """
+    ids = sorted(set(series_ids))
+    if not ids:
+        return []
+
+    return conn.execute(
+        text("""
+            INSERT INTO dataset_versions (dataset_id, version, updated_at)
+            SELECT DISTINCT dataset_id, 1, now()
+            FROM meta_series
+            WHERE series_id = ANY(:ids)
+            ON CONFLICT (dataset_id) DO UPDATE
+            SET version = dataset_versions.version + 1,
+                updated_at = now()
+            RETURNING dataset_id
+        """),
+        {"ids": ids},
+    ).scalars().all()
+
+
+def bump_all_versions(conn) -> None:
+    """
+    For changes that cut across datasets (e.g. dropping old partitions).
+    """
+    conn.execute(text(
+        "UPDATE dataset_versions SET version = version + 1, updated_at = now()"
+    ))
+    # Datasets never bumped before start at 1 (readers treat missing as 0)
+    conn.execute(text("""
+        INSERT INTO dataset_versions (dataset_id, version, updated_at)
+        SELECT DISTINCT dataset_id, 1, now() FROM meta_series
+        ON CONFLICT (dataset_id) DO NOTHING
+    """))
@@ -1,5 +1,7 @@
 from sqlalchemy import text
 from app.db.connection import engine
+from app.db.registry import refresh_dataset_counts
+from app.db.versions import bump_dataset_versions
 
 
 def infer_type(value):
@@ -62,3 +64,6 @@ def discover_fields(dataset_id: str):
                     "example": str(meta["example"])[:200],
                 }
             )
+
+        refresh_dataset_counts(conn, [dataset_id])
+        bump_dataset_versions(conn, [dataset_id])
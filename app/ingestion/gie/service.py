@@ -3,6 +3,8 @@ from sqlalchemy import text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy import bindparam
 from app.db.connection import engine
+from app.db.registry import record_raw_events
+from app.db.versions import bump_dataset_versions
 from app.ingestion.gie.client import GIEClient
 from app.ingestion.gie.transformer import transform
 from app.ingestion.gie.series_builder import get_or_create_asset, get_or_create_series
@@ -29,6 +31,8 @@ def ingest_gie(dataset: str, source: str, country: str | None = None):
                 "payload": raw_json,
             }
         )
+        record_raw_events(conn, dataset, source, 1)
+        bump_dataset_versions(conn, [dataset])
 
     rows = transform(dataset, raw_json)
 
@@ -74,3 +78,5 @@ def ingest_gie(dataset: str, source: str, country: str | None = None):
                     "asset_id": asset_id,
                 }
             )
+
+        bump_dataset_versions(conn, [dataset])
@@ -0,0 +1,119 @@
+"""
+Low-latency INSTANTANEOUS_FLOW poller with diff-only writes.
+
+The endpoint returns the whole rolling window for every site on each
+call. The poller remembers the last applicableAt loaded per site (primed
+from Postgres on first use) and sends only newer rows through the normal
+raw -> register -> transform -> upsert path, so polling every couple of
+minutes writes each point once. A poll that brings nothing new writes
+nothing.
+
+Run with:  python -m app.ingestion.instantaneous_poller [--interval 120]
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from app.config.settings import settings
+from app.db.connection import engine
+from app.db.latest import fetch_latest
+from app.ingestion.national_gas_client import NationalGasClient
+from app.ingestion.run_all import load_frame
+from app.ingestion.series_autoregister import make_series_id
+from app.utils.logger import logger
+
+
+DATASET_ID = "INSTANTANEOUS_FLOW"
+
+
+def _series_id(site_name: str) -> str:
+    return make_series_id(DATASET_ID, site_name, "FLOWRATE")
+
+
+def _naive_utc(value: str) -> datetime:
+    # Offset-aware when observation_time is a TIMESTAMPTZ column
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+class InstantaneousFlowPoller:
+    def __init__(self, client: NationalGasClient | None = None):
+        self.client = client or NationalGasClient()
+        self.last_seen: dict[str, datetime] | None = None   # series_id -> applicableAt (naive UTC)
+        self.discovered = False
+
+    def prime(self) -> None:
+        """Start from the newest stored point of each site."""
+        with engine.connect() as conn:
+            latest = fetch_latest(conn, dataset_id=DATASET_ID)
+
+        self.last_seen = {
+            sid: _naive_utc(entry["observation_time"])
+            for sid, entry in latest.items()
+        }
+        logger.info(f"{DATASET_ID} poller primed with {len(self.last_seen)} sites")
+
+    def new_rows(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Rows of a snapshot newer than the last point seen for their site."""
+        if df.empty:
+            return df
+
+        series_ids = df["siteName"].map(_series_id, na_action="ignore")
+        times = pd.to_datetime(df["applicableAt"], utc=True).dt.tz_localize(None)
+        seen = pd.to_datetime(series_ids.map(self.last_seen)).astype(times.dtype)
+
+        return df[times.notna() & (seen.isna() | (times > seen))]
+
+    def poll(self) -> int:
+        """Fetch the snapshot once and load what is new; returns the row count."""
+        if self.last_seen is None:
+            self.prime()
+
+        df = self.new_rows(self.client.fetch_instantaneous_flow())
+        if df.empty:
+            logger.debug(f"{DATASET_ID}: no new points")
+            return 0
+
+        # Field discovery scans every raw event of the dataset: once per process
+        load_frame(df, DATASET_ID, discover=not self.discovered)
+        self.discovered = True
+
+        times = pd.to_datetime(df["applicableAt"], utc=True).dt.tz_localize(None)
+        for sid, newest in times.groupby(df["siteName"].map(_series_id)).max().items():
+            self.last_seen[sid] = newest.to_pydatetime()
+
+        logger.info(f"{DATASET_ID}: loaded {len(df)} new points")
+        return len(df)
+
+
+_poller = None
+
+
+def poll_instantaneous_flow() -> int:
+    """Scheduler entry point; keeps one poller (and its state) per process."""
+    global _poller
+    if _poller is None:
+        _poller = InstantaneousFlowPoller()
+    return _poller.poll()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="INSTANTANEOUS_FLOW poller")
+    parser.add_argument("--interval", type=float, default=settings.INSTANT_FLOW_POLL_SECONDS)
+    parser.add_argument("--once", action="store_true")
+    args = parser.parse_args()
+
+    while True:
+        started = time.monotonic()
+        try:
+            poll_instantaneous_flow()
+        except Exception as e:
+            logger.error(f"{DATASET_ID} poll failed: {e}")
+
+        if args.once:
+            break
+        time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
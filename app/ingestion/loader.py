@@ -1,13 +1,28 @@
+from datetime import datetime
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.dialects.postgresql import insert
 from app.db.connection import engine
+from app.db.keys import normalize_flag, resolve_flag_ids, resolve_series_keys
+from app.db.latest import update_latest
 from app.db.models import DataObservation
+from app.db.notify import notify_observations
+from app.db.partitions import ensure_partitions_for, forget_partitions, is_missing_partition
+from app.db.registry import refresh_dataset_counts
+from app.db.rollups import refresh_rollups
+from app.db.versions import bump_series_versions
 from app.utils.logger import logger
 
 
-def upsert_observations(records: list[dict]) -> None:
+def upsert_observations(records: list[dict]) -> list[str]:
+    """
+    Insert or update the records in one transaction; returns the series
+    with new or changed rows. The latest snapshot is left to the caller
+    (refresh_latest), so a load updates it once.
+    """
     if not records:
         logger.warning("No records to insert.")
-        return
+        return []
 
     # 🔥 FIX: Deduplicate by unique constraint
     unique = {}
@@ -17,19 +32,104 @@ def upsert_observations(records: list[dict]) -> None:
 
     deduped_records = list(unique.values())
 
-    stmt = insert(DataObservation).values(deduped_records)
+    # Backfills may reach months the scheduler has not pre-created
+    times = [r["observation_time"] for r in deduped_records]
+    ensure_partitions_for(times)
+
+    # Own transaction: the lookups cache new flag ids, which must not be
+    # rolled back with a failed write
+    with engine.begin() as conn:
+        # Text ids -> compact integer keys used by data_observations
+        series_keys = resolve_series_keys(
+            conn, {r["series_id"] for r in deduped_records}
+        )
+        flag_ids = resolve_flag_ids(
+            conn, {normalize_flag(r.get("quality_flag")) for r in deduped_records}
+        )
+
+    try:
+        written, changed = _write(deduped_records, series_keys, flag_ids)
+    except IntegrityError as e:
+        if not is_missing_partition(e):
+            raise
+        # Another process (retention, cold export) removed a month this
+        # one still had cached as existing
+        logger.warning(f"Partition missing, re-checking: {e.orig}")
+        forget_partitions()
+        ensure_partitions_for(times)
+        written, changed = _write(deduped_records, series_keys, flag_ids)
+
+    logger.info(f"Upserted {len(deduped_records)} observations ({len(written)} new or changed).")
+    return changed
 
-    stmt = stmt.on_conflict_do_update(
-        index_elements=["series_id", "observation_time"],
-        set_={
-            "value": stmt.excluded.value,
-            "ingestion_time": stmt.excluded.ingestion_time,
-            "quality_flag": stmt.excluded.quality_flag,
-            "raw_payload": stmt.excluded.raw_payload,
-        },
-    )
 
+def _write(records: list[dict], series_keys: dict[str, int], flag_ids: dict[str, int]) -> tuple:
+    """
+    One transaction: upsert, rollups, versions, NOTIFY. Returns the written
+    (series_key, observation_time) rows and the series they belong to.
+    """
     with engine.begin() as conn:
-        conn.execute(stmt)
+        now = datetime.utcnow()
+        rows = []
+        for r in records:
+            flag = normalize_flag(r.get("quality_flag"))
+            rows.append({
+                "series_key": series_keys[r["series_id"]],
+                "observation_time": r["observation_time"],
+                "value": r["value"],
+                "quality_flag_id": flag_ids[flag],
+                "raw_payload": r.get("raw_payload"),
+                "ingestion_time": now,
+            })
+
+        stmt = insert(DataObservation).values(rows)
+
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["series_key", "observation_time"],
+            set_={
+                "value": stmt.excluded.value,
+                "ingestion_time": stmt.excluded.ingestion_time,
+                "quality_flag_id": stmt.excluded.quality_flag_id,
+                "raw_payload": stmt.excluded.raw_payload,
+            },
+            # Re-read lookback windows leave unchanged rows alone (and unannounced)
+            where=(
+                tuple_(
+                    DataObservation.value,
+                    DataObservation.quality_flag_id,
+                    DataObservation.raw_payload,
+                ).is_distinct_from(tuple_(
+                    stmt.excluded.value,
+                    stmt.excluded.quality_flag_id,
+                    stmt.excluded.raw_payload,
+                ))
+            ),
+        ).returning(DataObservation.series_key, DataObservation.observation_time)
+
+        written = conn.execute(stmt).fetchall()
+
+        ids = {key: sid for sid, key in series_keys.items()}
+        changed = sorted({ids[w[0]] for w in written})
+
+        # Hourly / gas-day rollups for the buckets this batch touched
+        refresh_rollups(conn, [w[0] for w in written], [w[1] for w in written])
+
+        datasets = bump_series_versions(conn, changed)
+        refresh_dataset_counts(conn, datasets)
+
+        # Delivered to LISTENers on commit (see app.api.v2.stream)
+        notify_observations(conn, series_keys, written, now)
+
+    return written, changed
+
 
-    logger.info(f"Upserted {len(deduped_records)} observations.")
+def refresh_latest(series_ids) -> None:
+    """
+    Merge the given series into the latest snapshot. Called after the
+    upserts have committed, so snapshot readers never see uncommitted rows;
+    a failure is logged, not raised.
+    """
+    try:
+        update_latest(series_ids)
+    except Exception as e:
+        logger.warning(f"Latest snapshot not updated: {e}")
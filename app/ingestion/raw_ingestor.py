@@ -1,5 +1,7 @@
 from sqlalchemy import insert
 from app.db.connection import engine
+from app.db.registry import record_raw_events
+from app.db.versions import bump_dataset_versions
 from app.utils.logger import logger
 from datetime import datetime
 import pandas as pd
@@ -50,6 +52,11 @@ def ingest_raw_df(
 
     with engine.begin() as conn:
         conn.execute(stmt)
+        record_raw_events(
+            conn, dataset_id, source, len(records),
+            records[0]["ingested_at"], records[-1]["ingested_at"],
+        )
+        bump_dataset_versions(conn, [dataset_id])
 
     logger.info(f"Raw-ingested {len(records)} rows for {dataset_id}")
 
@@ -6,7 +6,7 @@ from app.ingestion.transformer import (
     transform_instantaneous_flow,
     transform_gas_publications,
 )
-from app.ingestion.loader import upsert_observations
+from app.ingestion.loader import refresh_latest, upsert_observations
 from app.utils.logger import logger
 from app.ingestion.raw_ingestor import ingest_raw_df
 from app.ingestion.field_discovery import discover_fields
@@ -75,11 +75,30 @@ def ingest_dataset(
         logger.warning(f"No data returned for dataset={dataset_id}")
         return
 
+    load_frame(df, dataset_id, from_date=from_date, to_date=to_date)
+
+    logger.info(f"Completed ingestion for dataset={dataset_id}")
+
+
+def load_frame(
+    df,
+    dataset_id: str,
+    from_date: str | None = None,
+    to_date: str | None = None,
+    discover: bool = True,
+):
+    """
+    Everything after the fetch: raw events, field discovery, series
+    registration, transform and upsert of the rows in `df`.
+    discover=False skips field discovery (a scan of the dataset's raw
+    events), e.g. for frequent pollers whose payload shape is known.
+    """
     # 🧱 RAW (zero-loss)
     ingest_raw_df(df, dataset_id)
 
     # 🧠 DISCOVERY (auto schema)
-    discover_fields(dataset_id)
+    if discover:
+        discover_fields(dataset_id)
 
     # 🔥 SERIES (auto-register)
     series_map = register_series_from_df(df, dataset_id)
@@ -88,6 +107,7 @@ def ingest_dataset(
         return
 
     # 🔄 TRANSFORM + LOAD
+    changed = []
     for _, series_id in series_map.items():
 
         if dataset_id == "GAS_QUALITY":
@@ -115,6 +135,7 @@ def ingest_dataset(
             logger.warning(f"No transformed records for series_id={series_id}")
             continue
 
-        upsert_observations(records)
+        changed += upsert_observations(records)
 
-    logger.info(f"Completed ingestion for dataset={dataset_id}")
+    # One snapshot rewrite per load, not per series
+    refresh_latest(changed)
@@ -5,6 +5,9 @@ from app.api.v2.discovery import router as discovery_router
 from app.api.v2.ingestion import router as ingestion_router
 from app.api.v2.export import router as export_router
 from app.api.v2.gie import router as gie_router
+from app.api.v2.cache import router as cache_router
+from app.api.v2.latest import router as latest_router
+from app.api.v2.stream import router as stream_router
 
 
 app = FastAPI(
@@ -19,4 +22,7 @@ app.include_router(discovery_router)
 app.include_router(ingestion_router)
 app.include_router(export_router)
 app.include_router(gie_router)
+app.include_router(cache_router)
+app.include_router(latest_router)
+app.include_router(stream_router)
 
@@ -1,6 +1,12 @@
 from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.triggers.cron import CronTrigger
+from app.db.partitions import maintain_partitions
+from app.archive.raw_events import archive_raw_events
+from app.archive.observations import export_cold_observations
 from app.ingestion.run_all import run_national_gas
+from app.ingestion.instantaneous_poller import poll_instantaneous_flow
+from app.config.settings import settings
 from app.utils.logger import logger
 
 
@@ -17,6 +23,46 @@ def start_scheduler():
         coalesce=True,
     )
 
+    scheduler.add_job(
+        func=poll_instantaneous_flow,
+        trigger=IntervalTrigger(seconds=settings.INSTANT_FLOW_POLL_SECONDS),
+        id="instantaneous_flow_poller",
+        name="INSTANTANEOUS_FLOW poller (new points only)",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+
+    scheduler.add_job(
+        func=maintain_partitions,
+        trigger=CronTrigger(hour=0, minute=15),
+        id="partition_maintenance",
+        name="Daily data_observations partition maintenance",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+
+    scheduler.add_job(
+        func=archive_raw_events,
+        trigger=CronTrigger(hour=1, minute=0),
+        id="raw_event_archival",
+        name="Daily raw_events archival to Parquet",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+
+    scheduler.add_job(
+        func=export_cold_observations,
+        trigger=CronTrigger(hour=2, minute=0),
+        id="cold_tier_export",
+        name="Daily export of old observation partitions to Parquet",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+
     logger.info("Scheduler started: National Gas ingestion every hour")
 
     try:
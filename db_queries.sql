@@ -46,6 +46,7 @@ GRANT ALL ON SEQUENCES TO gas_user;
 
 CREATE TABLE IF NOT EXISTS meta_series (
     series_id TEXT PRIMARY KEY,
+    series_key INTEGER GENERATED BY DEFAULT AS IDENTITY UNIQUE,
     source TEXT NOT NULL,
     source_type TEXT DEFAULT 'NATIONAL_GAS',
     dataset_id TEXT NOT NULL,
@@ -65,19 +66,35 @@ CREATE TABLE IF NOT EXISTS meta_series (
    STEP 5 — DATA OBSERVATIONS
    ========================================================= */
 
+-- Small-int lookup for quality flags (ACTUAL, ESTIMATE, ...)
+CREATE TABLE IF NOT EXISTS quality_flags (
+    flag_id SMALLINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    flag TEXT NOT NULL UNIQUE
+);
+
+-- Observations without a flag are stored as UNKNOWN
+INSERT INTO quality_flags (flag) VALUES ('UNKNOWN')
+ON CONFLICT (flag) DO NOTHING;
+
+-- Keyed by meta_series.series_key (INTEGER) instead of the TEXT series_id.
+-- Fixed-width columns first so rows pack without alignment padding.
+--
+-- Partitioned by month on observation_time.
+-- Monthly partitions (data_observations_pYYYYMM) are created ahead of time
+-- by app.db.partitions. Existing databases are converted with:
+--   python -m app.db.partitions migrate
+--   python -m app.db.keys migrate
+
 CREATE TABLE IF NOT EXISTS data_observations (
-    series_id TEXT NOT NULL REFERENCES meta_series(series_id),
     observation_time TIMESTAMP NOT NULL,
-    ingestion_time TIMESTAMP DEFAULT NOW(),
     value DOUBLE PRECISION NOT NULL,
-    quality_flag TEXT DEFAULT 'ACTUAL',
+    series_key INTEGER NOT NULL REFERENCES meta_series(series_key),
+    quality_flag_id SMALLINT REFERENCES quality_flags(flag_id),
+    ingestion_time TIMESTAMP DEFAULT NOW(),
     raw_payload JSONB,
 
-    PRIMARY KEY (series_id, observation_time)
-);
-
-CREATE INDEX IF NOT EXISTS idx_data_obs_series_time
-ON data_observations(series_id, observation_time);
+    PRIMARY KEY (series_key, observation_time)
+) PARTITION BY RANGE (observation_time);
 
 CREATE INDEX IF NOT EXISTS idx_data_obs_raw
 ON data_observations USING GIN (raw_payload);
@@ -103,6 +120,10 @@ ON raw_events(dataset_id);
 CREATE INDEX IF NOT EXISTS idx_raw_events_payload
 ON raw_events USING GIN (raw_payload);
 
+-- Keyset paging (newest first) for raw/export endpoints
+CREATE INDEX IF NOT EXISTS idx_raw_events_dataset_time
+ON raw_events(dataset_id, ingested_at, id);
+
 
 /* =========================================================
    STEP 7 — FIELD CATALOG (DISCOVERY)
@@ -122,6 +143,75 @@ CREATE TABLE IF NOT EXISTS field_catalog (
 ALTER TABLE raw_events
 ADD COLUMN source TEXT NOT NULL DEFAULT 'NATIONAL_GAS';
 
+
+/* =========================================================
+   DATASET REGISTRY (DISCOVERY)
+   ========================================================= */
+
+-- Maintained by ingestion so discovery never scans raw_events.
+-- Backfill once with: python -m app.db.registry rebuild
+CREATE TABLE IF NOT EXISTS dataset_registry (
+    dataset_id TEXT PRIMARY KEY,
+    source TEXT,
+    first_ingested_at TIMESTAMP,
+    last_ingested_at TIMESTAMP,
+    raw_event_count BIGINT NOT NULL DEFAULT 0,
+    series_count INTEGER NOT NULL DEFAULT 0,
+    field_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+
+/* =========================================================
+   DATASET VERSIONS (API RESPONSE CACHE)
+   ========================================================= */
+
+-- Bumped by every ingestion write; cached API responses are only
+-- reused while the versions they were built from are unchanged.
+CREATE TABLE IF NOT EXISTS dataset_versions (
+    dataset_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+/* =========================================================
+   OBSERVATION ROLLUPS (HOURLY / GAS DAY)
+   ========================================================= */
+
+-- Mergeable aggregates per (series_key, bucket), refreshed for the
+-- touched buckets by every upsert_observations batch. bucket is the UTC
+-- start of the hour / gas day (05:00-05:00 Europe/London).
+-- Backfill once with: python -m app.db.rollups rebuild
+CREATE TABLE IF NOT EXISTS data_rollup_hourly (
+    series_key INTEGER NOT NULL REFERENCES meta_series(series_key),
+    bucket TIMESTAMP NOT NULL,
+    n BIGINT NOT NULL,
+    total DOUBLE PRECISION NOT NULL,
+    min_value DOUBLE PRECISION NOT NULL,
+    max_value DOUBLE PRECISION NOT NULL,
+    first_time TIMESTAMP NOT NULL,
+    first_value DOUBLE PRECISION NOT NULL,
+    last_time TIMESTAMP NOT NULL,
+    last_value DOUBLE PRECISION NOT NULL,
+
+    PRIMARY KEY (series_key, bucket)
+);
+
+CREATE TABLE IF NOT EXISTS data_rollup_gasday (
+    series_key INTEGER NOT NULL REFERENCES meta_series(series_key),
+    bucket TIMESTAMP NOT NULL,
+    n BIGINT NOT NULL,
+    total DOUBLE PRECISION NOT NULL,
+    min_value DOUBLE PRECISION NOT NULL,
+    max_value DOUBLE PRECISION NOT NULL,
+    first_time TIMESTAMP NOT NULL,
+    first_value DOUBLE PRECISION NOT NULL,
+    last_time TIMESTAMP NOT NULL,
+    last_value DOUBLE PRECISION NOT NULL,
+
+    PRIMARY KEY (series_key, bucket)
+);
+
 ALTER TABLE raw_events
 ADD COLUMN series_hint TEXT;
 
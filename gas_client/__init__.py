@@ -1,6 +1,38 @@
-from gas_client.client import GasClient
+"""
+Python client for National Gas time-series data.
+
+Importing the package is cheap: GasClient (pandas, SQLAlchemy, settings)
+is loaded on first use, and the default client behind get_history /
+get_many is created on the first call. AsyncGasClient is the asyncio
+equivalent.
+"""
+
+__all__ = ["AsyncGasClient", "GasClient", "get_history", "get_many"]
+
+_client = None
+
+
+def _default_client():
+    global _client
+    if _client is None:
+        from gas_client.client import GasClient
+        _client = GasClient()
+    return _client
 
-_client = GasClient()
 
 def get_history(*args, **kwargs):
-    return _client.get_history(*args, **kwargs)
+    return _default_client().get_history(*args, **kwargs)
+
+
+def get_many(*args, **kwargs):
+    return _default_client().get_many(*args, **kwargs)
+
+
+def __getattr__(name):
+    if name == "GasClient":
+        from gas_client.client import GasClient
+        return GasClient
+    if name == "AsyncGasClient":
+        from gas_client.async_client import AsyncGasClient
+        return AsyncGasClient
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
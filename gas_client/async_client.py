@@ -0,0 +1,138 @@
+"""
+AsyncGasClient: GasClient's reads as coroutines, for asyncio services.
+
+Hot rows are streamed with binary COPY over asyncpg (the async engine's
+driver), the Parquet cold tier is read in a worker thread, and get_many
+fetches its series concurrently, at most `concurrency` at a time.
+"""
+import asyncio
+from datetime import datetime
+
+import pandas as pd
+
+from gas_client.client import _check_shape, _naive_utc, _reshape, _time_range
+from gas_client.copy_reader import copy_observations_async
+
+
+class AsyncGasClient:
+    def __init__(
+        self,
+        url: str | None = None,
+        pool_size: int = 4,
+        max_overflow: int = 0,
+        engine=None,
+        archive: bool = True,
+        concurrency: int = 4,
+    ):
+        """
+        url (a SQLAlchemy postgresql+asyncpg URL) gives the client its own
+        async engine and pool; an existing AsyncEngine can be passed as
+        `engine` instead. With neither, the app's async_engine is used.
+        At most `concurrency` queries run at once.
+        """
+        self.url = url
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.archive = archive
+        self.concurrency = concurrency
+        self._engine = engine
+        self._owns_engine = False
+        self._limit = None
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            if self.url is None:
+                from app.db.connection import async_engine
+                self._engine = async_engine
+            else:
+                from sqlalchemy.ext.asyncio import create_async_engine
+                self._engine = create_async_engine(
+                    self.url,
+                    pool_pre_ping=True,
+                    pool_size=self.pool_size,
+                    max_overflow=self.max_overflow,
+                )
+                self._owns_engine = True
+        return self._engine
+
+    async def close(self) -> None:
+        """Dispose of the client's own engine (a shared one is left open)."""
+        if self._owns_engine:
+            await self._engine.dispose()
+            self._engine = None
+            self._owns_engine = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def get_history(
+        self,
+        series_id: str,
+        last_days: int | None = None,
+        start: str | None = None,
+        end: str | None = None,
+    ) -> pd.DataFrame:
+        """
+        GasClient.get_history(): values of one series indexed by
+        observation_time (naive UTC). Not cached.
+        """
+        start_dt, end_dt = _time_range(last_days, start, end)
+        df = await self._fetch_series(series_id, _naive_utc(start_dt), _naive_utc(end_dt))
+        return df[["observation_time", "value"]].set_index("observation_time")
+
+    async def get_many(
+        self,
+        series_ids: list[str],
+        last_days: int | None = None,
+        start: str | None = None,
+        end: str | None = None,
+        shape: str = "wide",
+    ) -> pd.DataFrame:
+        """
+        GasClient.get_many(), with one concurrent query per series.
+        """
+        _check_shape(shape)
+        series_ids = list(dict.fromkeys(series_ids))
+        start_dt, end_dt = map(_naive_utc, _time_range(last_days, start, end))
+
+        frames = await asyncio.gather(*(
+            self._fetch_series(series_id, start_dt, end_dt) for series_id in sorted(series_ids)
+        ))
+        if frames:
+            df = pd.concat(frames, ignore_index=True)
+        else:
+            df = pd.DataFrame(columns=["series_id", "observation_time", "value"])
+
+        return _reshape(df, series_ids, shape)
+
+    # ---------------- Database ----------------
+
+    async def _fetch_series(self, series_id: str, start_dt: datetime, end_dt: datetime) -> pd.DataFrame:
+        # Created here so it binds to the running event loop
+        if self._limit is None:
+            self._limit = asyncio.Semaphore(self.concurrency)
+
+        async with self._limit:
+            async with self.engine.connect() as conn:
+                raw = await conn.get_raw_connection()
+                df = await copy_observations_async(raw.driver_connection, [series_id], start_dt, end_dt)
+
+            # Older months may live in the Parquet cold tier (DuckDB blocks)
+            cold_tier = self._cold_tier(start_dt)
+            if cold_tier is not None:
+                cold = await asyncio.to_thread(cold_tier.read_cold_history, [series_id], start_dt, end_dt)
+                df = cold_tier.stitch_long_history(cold, df)
+
+        return df
+
+    def _cold_tier(self, start_dt: datetime):
+        """app.archive.observations when [start_dt, ...) reaches the cold tier."""
+        if not self.archive:
+            return None
+
+        from app.archive import observations
+        return observations if observations.reaches_cold(start_dt) else None
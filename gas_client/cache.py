@@ -0,0 +1,182 @@
+"""
+On-disk Parquet cache for GasClient.get_history.
+
+Layout, one directory per series:
+
+    {root}/{series_id}/month=YYYY-MM.parquet
+    {root}/{series_id}/state.json
+
+state.json records the range the cache is complete for (covered_start /
+covered_end) and the newest cached observation (high-water mark).
+Timestamps are naive UTC. Its mtime is the series' last access, for LRU
+eviction: reads touch it rather than rewrite it.
+"""
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import quote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+COLUMNS = ["observation_time", "value"]
+
+SCHEMA = pa.schema([
+    pa.field("observation_time", pa.timestamp("us")),
+    pa.field("value", pa.float64()),
+])
+
+
+def _empty() -> pd.DataFrame:
+    return SCHEMA.empty_table().to_pandas().set_index("observation_time")
+
+
+def _months(start: datetime, end: datetime) -> list[pd.Period]:
+    return list(pd.period_range(start, end, freq="M"))
+
+
+class HistoryCache:
+    def __init__(self, root: str | os.PathLike, max_bytes: int | None = None):
+        self.root = Path(root).expanduser()
+        self.max_bytes = max_bytes
+
+    # ---------------- Paths / state ----------------
+
+    def _dir(self, series_id: str) -> Path:
+        return self.root / quote(series_id, safe="")
+
+    def _month_file(self, series_id: str, month: pd.Period) -> Path:
+        return self._dir(series_id) / f"month={month.strftime('%Y-%m')}.parquet"
+
+    def state(self, series_id: str) -> dict | None:
+        path = self._dir(series_id) / "state.json"
+        if not path.exists():
+            return None
+
+        raw = json.loads(path.read_text())
+        return {
+            k: datetime.fromisoformat(v) if v else v
+            for k, v in raw.items()
+        }
+
+    def _save_state(self, series_id: str, state: dict) -> None:
+        path = self._dir(series_id) / "state.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            k: v.isoformat() if isinstance(v, datetime) else v
+            for k, v in state.items()
+        }))
+        os.replace(tmp, path)
+
+    # ---------------- Read / write ----------------
+
+    def read(self, series_id: str, start: datetime, end: datetime) -> pd.DataFrame:
+        """Cached rows with start <= observation_time <= end."""
+        files = [
+            str(f) for m in _months(start, end)
+            if (f := self._month_file(series_id, m)).exists()
+        ]
+        if not files:
+            return _empty()
+
+        df = pq.read_table(
+            files,
+            schema=SCHEMA,
+            filters=[("observation_time", ">=", start), ("observation_time", "<=", end)],
+        ).to_pandas()
+
+        state_file = self._dir(series_id) / "state.json"
+        if state_file.exists():
+            os.utime(state_file)
+
+        return df.set_index("observation_time").sort_index()
+
+    def write(self, series_id: str, rows: pd.DataFrame, start: datetime, end: datetime) -> None:
+        """
+        Replace the cached rows in [start, end] with `rows` (indexed by
+        observation_time) and extend the covered range.
+        """
+        rows = rows.reset_index()[COLUMNS]
+        directory = self._dir(series_id)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        for month in _months(start, end):
+            path = self._month_file(series_id, month)
+            lo, hi = month.start_time, month.end_time
+
+            fresh = rows[(rows["observation_time"] >= lo) & (rows["observation_time"] <= hi)]
+            if path.exists():
+                kept = pq.read_table(path, schema=SCHEMA).to_pandas()
+                kept = kept[(kept["observation_time"] < start) | (kept["observation_time"] > end)]
+                fresh = pd.concat([kept, fresh], ignore_index=True)
+
+            if fresh.empty:
+                path.unlink(missing_ok=True)
+                continue
+
+            tmp = path.with_suffix(".tmp")
+            pq.write_table(
+                pa.Table.from_pandas(fresh.sort_values("observation_time"), schema=SCHEMA, preserve_index=False),
+                tmp,
+                compression="zstd",
+            )
+            os.replace(tmp, path)
+
+        state = self.state(series_id) or {"covered_start": start, "covered_end": end, "hwm": None}
+        state["covered_start"] = min(state["covered_start"], start)
+        state["covered_end"] = max(state["covered_end"], end)
+        if not rows.empty:
+            newest = rows["observation_time"].max().to_pydatetime()
+            state["hwm"] = max(state["hwm"], newest) if state["hwm"] else newest
+        self._save_state(series_id, state)
+
+        self.evict(keep=series_id)
+
+    # ---------------- Maintenance ----------------
+
+    def invalidate(self, series_ids: list[str] | None = None) -> None:
+        """Drop the given series (all series when None)."""
+        if series_ids is None:
+            shutil.rmtree(self.root, ignore_errors=True)
+            return
+
+        for series_id in series_ids:
+            shutil.rmtree(self._dir(series_id), ignore_errors=True)
+
+    def size(self) -> int:
+        if not self.root.exists():
+            return 0
+        return sum(f.stat().st_size for f in self.root.rglob("*") if f.is_file())
+
+    def evict(self, keep: str | None = None) -> list[str]:
+        """
+        Remove least recently used series (other than `keep`) until the
+        cache fits in max_bytes; returns the evicted directory names.
+        """
+        if self.max_bytes is None or not self.root.exists():
+            return []
+
+        series = []
+        for directory in self.root.iterdir():
+            if keep is not None and directory == self._dir(keep):
+                continue
+            files = [f for f in directory.rglob("*") if f.is_file()]
+            state_file = directory / "state.json"
+            accessed = state_file.stat().st_mtime if state_file.exists() else 0
+            series.append((accessed, sum(f.stat().st_size for f in files), directory))
+
+        total = self.size()
+        evicted = []
+
+        for _, size, directory in sorted(series, key=lambda s: s[0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(directory, ignore_errors=True)
+            total -= size
+            evicted.append(directory.name)
+
+        return evicted
@@ -1,10 +1,138 @@
+"""
+GasClient: observation history as pandas DataFrames.
+
+The database engine, the cold-tier reader (app.archive.observations) and
+the on-disk cache are only imported / created when first needed, so
+constructing a client is cheap and needs no DB settings.
+"""
 import pandas as pd
 from datetime import datetime, timezone, timedelta
-from sqlalchemy import text
-from app.db.connection import engine
+from gas_client.copy_reader import copy_observations
+
+
+COLUMNS = ["series_id", "observation_time", "value"]
+
+STREAM_SQL = """
+    SELECT m.series_id, d.observation_time, d.value
+    FROM data_observations d
+    JOIN meta_series m ON m.series_key = d.series_key
+    WHERE m.series_id = ANY(:series_ids)
+      AND d.observation_time BETWEEN :start AND :end
+    ORDER BY d.observation_time, m.series_id
+"""
+
+
+def _time_range(last_days: int | None, start: str | None, end: str | None):
+    if last_days is None and (start is None or end is None):
+        raise ValueError("Provide either last_days or start & end")
+
+    if last_days is not None:
+        end_dt = datetime.now(timezone.utc)
+        start_dt = end_dt - timedelta(days=last_days)
+    else:
+        start_dt = datetime.fromisoformat(start).replace(tzinfo=timezone.utc)
+        end_dt = datetime.fromisoformat(end).replace(tzinfo=timezone.utc)
+
+    return start_dt, end_dt
+
+
+def _naive_utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _check_shape(shape: str) -> None:
+    if shape not in ("wide", "long"):
+        raise ValueError("shape must be 'wide' or 'long'")
+
+
+def _reshape(df: pd.DataFrame, series_ids: list[str], shape: str) -> pd.DataFrame:
+    """get_many() result from a long frame sorted by series_id, time."""
+    if shape == "long":
+        return df
+
+    wide = df.pivot(index="observation_time", columns="series_id", values="value")
+    return wide.reindex(columns=series_ids)
 
 
 class GasClient:
+    def __init__(
+        self,
+        url: str | None = None,
+        pool_size: int = 2,
+        max_overflow: int = 2,
+        engine=None,
+        base_url: str | None = None,
+        headers: dict | None = None,
+        archive: bool = True,
+        cache_dir: str | None = None,
+        cache_max_bytes: int | None = None,
+        revision_days: float = 3,
+    ):
+        """
+        url (a SQLAlchemy URL) gives the client its own engine and pool of
+        pool_size + max_overflow connections; an existing `engine` can be
+        passed instead. With neither, the app engine (POSTGRES_* settings)
+        is used. archive=False skips the Parquet cold tier.
+
+        base_url (e.g. "http://gas-api:8000") reads through the API instead
+        of the database (see gas_client.http_backend), reusing up to
+        pool_size + max_overflow keep-alive connections; `headers` are
+        sent with every request. Results have the same shape either way.
+
+        cache_dir enables the on-disk history cache (see gas_client.cache).
+        Repeat get_history calls then only fetch rows newer than the cached
+        high-water mark minus revision_days, so late revisions are picked up.
+        """
+        self.url = url
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.archive = archive
+        self._engine = engine
+        self._owns_engine = False
+
+        self.http = None
+        if base_url:
+            from gas_client.http_backend import HttpBackend
+            self.http = HttpBackend(base_url, pool_maxsize=pool_size + max_overflow, headers=headers)
+
+        self.cache = None
+        if cache_dir:
+            from gas_client.cache import HistoryCache
+            self.cache = HistoryCache(cache_dir, cache_max_bytes)
+        self.revision_window = timedelta(days=revision_days)
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            if self.url is None:
+                from app.db.connection import engine
+                self._engine = engine
+            else:
+                from sqlalchemy import create_engine
+                self._engine = create_engine(
+                    self.url,
+                    pool_pre_ping=True,
+                    pool_size=self.pool_size,
+                    max_overflow=self.max_overflow,
+                )
+                self._owns_engine = True
+        return self._engine
+
+    def close(self) -> None:
+        """Dispose of the client's own engine (a shared one is left open)."""
+        if self.http is not None:
+            self.http.close()
+        if self._owns_engine:
+            self._engine.dispose()
+            self._engine = None
+            self._owns_engine = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
     def get_history(
         self,
         series_id: str,
@@ -13,36 +141,195 @@ class GasClient:
         end: str | None = None,
     ) -> pd.DataFrame:
 
-        if last_days is None and (start is None or end is None):
-            raise ValueError("Provide either last_days or start & end")
+        start_dt, end_dt = _time_range(last_days, start, end)
+
+        if self.cache is None:
+            return self._fetch_history(series_id, start_dt, end_dt)
+
+        self._sync(series_id, start_dt, end_dt)
+        return self.cache.read(series_id, _naive_utc(start_dt), _naive_utc(end_dt))
 
-        if last_days is not None:
-            end_dt = datetime.now(timezone.utc)
-            start_dt = end_dt - timedelta(days=last_days)
+    def get_many(
+        self,
+        series_ids: list[str],
+        last_days: int | None = None,
+        start: str | None = None,
+        end: str | None = None,
+        shape: str = "wide",
+    ) -> pd.DataFrame:
+        """
+        History of several series from one query.
+
+        shape="wide": indexed by observation_time, one column per series
+        (in the order given, NaN where a series has no point).
+        shape="long": series_id, observation_time, value rows.
+        """
+        _check_shape(shape)
+        series_ids = list(dict.fromkeys(series_ids))
+        start_dt, end_dt = _time_range(last_days, start, end)
+
+        df = self._fetch_long(series_ids, start_dt, end_dt)
+        return _reshape(df, series_ids, shape)
+
+    def iter_history(
+        self,
+        series_ids: str | list[str],
+        last_days: int | None = None,
+        start: str | None = None,
+        end: str | None = None,
+        chunk: int = 100_000,
+    ):
+        """
+        History in time order as DataFrames of at most `chunk` rows, so a
+        long range never has to be held in memory at once.
+
+        A single series_id yields frames shaped like get_history(); a list
+        yields long frames ordered by observation_time, series_id. Hot rows
+        come through a server-side cursor, cold-tier months one at a time.
+        """
+        single = isinstance(series_ids, str)
+        series_ids = [series_ids] if single else list(dict.fromkeys(series_ids))
+        start_dt, end_dt = map(_naive_utc, _time_range(last_days, start, end))
+
+        if self.http is not None:
+            if not single:
+                raise ValueError("iter_history over HTTP takes one series_id")
+            frames = (
+                page.to_pandas(self_destruct=True)
+                for page in self.http.iter_pages(series_ids[0], start_dt, end_dt, chunk)
+            )
         else:
-            start_dt = datetime.fromisoformat(start).replace(tzinfo=timezone.utc)
-            end_dt = datetime.fromisoformat(end).replace(tzinfo=timezone.utc)
-
-        query = text("""
-            SELECT
-                observation_time,
-                value
-            FROM data_observations
-            WHERE series_id = :series_id
-              AND observation_time BETWEEN :start_dt AND :end_dt
-            ORDER BY observation_time
-        """)
-
-        with engine.begin() as conn:
-            rows = conn.execute(
-                query,
-                {
-                    "series_id": series_id,
-                    "start_dt": start_dt,
-                    "end_dt": end_dt,
-                },
-            ).fetchall()
-
-        df = pd.DataFrame(rows, columns=["observation_time", "value"])
-        df.set_index("observation_time", inplace=True)
+            frames = self._iter_long(series_ids, start_dt, end_dt, chunk)
+
+        for df in frames:
+            if df.empty:
+                continue
+            yield df[["observation_time", "value"]].set_index("observation_time") if single else df
+
+    # ---------------- Cache ----------------
+
+    def _require_cache(self):
+        if self.cache is None:
+            raise ValueError("GasClient was created without cache_dir")
+        return self.cache
+
+    def _fill(self, series_id: str, start_dt: datetime, end_dt: datetime) -> None:
+        df = self._fetch_history(series_id, start_dt, end_dt)
+        self.cache.write(series_id, df, _naive_utc(start_dt), _naive_utc(end_dt))
+
+    def _sync(self, series_id: str, start_dt: datetime, end_dt: datetime) -> None:
+        """Fetch whatever the cache is missing for [start_dt, end_dt]."""
+        state = self.cache.state(series_id)
+        if state is None:
+            self._fill(series_id, start_dt, end_dt)
+            return
+
+        covered_start = state["covered_start"].replace(tzinfo=timezone.utc)
+        if start_dt < covered_start:
+            self._fill(series_id, start_dt, covered_start)
+
+        # Newer rows, re-reading the revision window below the high-water mark
+        hwm = (state["hwm"] or state["covered_start"]).replace(tzinfo=timezone.utc)
+        since = max(hwm - self.revision_window, covered_start)
+        if end_dt > since:
+            self._fill(series_id, since, end_dt)
+
+    def warm(
+        self,
+        series_ids: list[str],
+        last_days: int | None = None,
+        start: str | None = None,
+        end: str | None = None,
+    ) -> None:
+        """Bring the cache of each series up to date for the given range."""
+        self._require_cache()
+        start_dt, end_dt = _time_range(last_days, start, end)
+
+        for series_id in series_ids:
+            self._sync(series_id, start_dt, end_dt)
+
+    def invalidate(self, series_ids: list[str] | None = None) -> None:
+        """Forget cached history (of all series when series_ids is None)."""
+        self._require_cache().invalidate(series_ids)
+
+    # ---------------- Database / API ----------------
+
+    def _fetch_long(self, series_ids: list[str], start_dt: datetime, end_dt: datetime) -> pd.DataFrame:
+        if self.http is not None:
+            return self.http.fetch(series_ids, start_dt, end_dt)
+
+        # Binary COPY straight into NumPy columns (see gas_client.copy_reader)
+        df = copy_observations(self.engine, series_ids, start_dt, end_dt)
+
+        # Older months may live in the Parquet cold tier
+        cold_tier = self._cold_tier(start_dt)
+        if cold_tier is not None:
+            cold = cold_tier.read_cold_history(series_ids, start_dt, end_dt)
+            df = cold_tier.stitch_long_history(cold, df)
+
+        return df
+
+    def _fetch_history(self, series_id: str, start_dt: datetime, end_dt: datetime) -> pd.DataFrame:
+        if self.http is not None:
+            rows = self.http.fetch([series_id], start_dt, end_dt)
+            return rows[["observation_time", "value"]].set_index("observation_time")
+
+        rows = copy_observations(self.engine, [series_id], start_dt, end_dt)
+        df = rows[["observation_time", "value"]].set_index("observation_time")
+
+        # Older months may live in the Parquet cold tier
+        cold_tier = self._cold_tier(start_dt)
+        if cold_tier is not None:
+            cold = cold_tier.read_cold_history([series_id], start_dt, end_dt)
+            df = cold_tier.stitch_history(cold, df)
+
+        # Naive UTC, like the cached path
+        if isinstance(df.index, pd.DatetimeIndex) and df.index.tz is not None:
+            df = df.tz_convert("UTC").tz_localize(None)
         return df
+
+    def _iter_long(self, series_ids: list[str], start_dt: datetime, end_dt: datetime, chunk: int):
+        """Long frames of up to `chunk` rows, ordered by time then series_id."""
+        cold_tier = self._cold_tier(start_dt)
+        if cold_tier is not None:
+            from app.db.partitions import add_months, month_start
+
+            upper = datetime.combine(cold_tier.cold_upper_bound(), datetime.min.time())
+            month = datetime.combine(month_start(start_dt), datetime.min.time())
+
+            # One month at a time: cold rows, plus any hot rows not yet dropped
+            while month < upper and month <= end_dt:
+                next_month = datetime.combine(add_months(month.date(), 1), datetime.min.time())
+                lo, hi = max(start_dt, month), min(end_dt, next_month)
+
+                hot = copy_observations(self.engine, series_ids, lo, hi)
+                cold = cold_tier.read_cold_history(series_ids, lo, hi)
+                df = cold_tier.stitch_long_history(cold, hot)
+                df = df[df["observation_time"] < next_month]
+                df = df.sort_values(["observation_time", "series_id"], ignore_index=True)
+
+                for i in range(0, len(df), chunk):
+                    yield df.iloc[i:i + chunk].reset_index(drop=True)
+                month = next_month
+
+            start_dt = max(start_dt, upper)
+
+        from sqlalchemy import text
+
+        params = {"series_ids": series_ids, "start": start_dt, "end": end_dt}
+
+        # Server-side (named) cursor, `chunk` rows per round trip
+        with self.engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, max_row_buffer=chunk).execute(
+                text(STREAM_SQL), params
+            )
+            for rows in result.partitions(chunk):
+                yield pd.DataFrame(rows, columns=COLUMNS)
+
+    def _cold_tier(self, start_dt: datetime):
+        """app.archive.observations when [start_dt, ...) reaches the cold tier."""
+        if not self.archive:
+            return None
+
+        from app.archive import observations
+        return observations if observations.reaches_cold(start_dt) else None
@@ -0,0 +1,148 @@
+"""
+Fast observation reads for GasClient.
+
+Rows are streamed with COPY (SELECT ...) TO STDOUT (FORMAT binary). With
+only NOT NULL fixed-width columns (series_key INTEGER, observation_time
+TIMESTAMP, value DOUBLE PRECISION) every row has the same 34-byte layout,
+so the whole payload is viewed as one NumPy structured array and turned
+into columns without creating a Python object per value.
+copy_observations_async() does the same over asyncpg.
+"""
+import io
+from datetime import timezone
+
+import numpy as np
+import pandas as pd
+
+
+SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+
+# Postgres timestamps count microseconds from 2000-01-01
+PG_EPOCH_US = 946_684_800_000_000
+
+# int16 field count, then (int32 length, value) per field; big-endian
+ROW = np.dtype([
+    ("fields", ">i2"),
+    ("key_len", ">i4"), ("series_key", ">i4"),
+    ("time_len", ">i4"), ("observation_time", ">i8"),
+    ("value_len", ">i4"), ("value", ">f8"),
+])
+
+COPY_SQL = """
+    COPY (
+        SELECT d.series_key, d.observation_time, d.value
+        FROM data_observations d
+        WHERE d.series_key = ANY(%(series_keys)s)
+          AND d.observation_time BETWEEN %(start)s AND %(end)s
+        ORDER BY d.series_key, d.observation_time
+    ) TO STDOUT (FORMAT binary)
+"""
+
+# The same rows for asyncpg's copy_from_query (which adds the COPY wrapper)
+ASYNC_SELECT_SQL = """
+    SELECT d.series_key, d.observation_time, d.value
+    FROM data_observations d
+    WHERE d.series_key = ANY($1::integer[])
+      AND d.observation_time BETWEEN $2::timestamp AND $3::timestamp
+    ORDER BY d.series_key, d.observation_time
+"""
+
+
+def _naive_utc(value):
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def parse_copy_binary(payload) -> dict[str, np.ndarray]:
+    """
+    Columns of a binary COPY payload with the ROW layout.
+    """
+    view = memoryview(payload)
+    if bytes(view[:len(SIGNATURE)]) != SIGNATURE:
+        raise ValueError("Not a binary COPY payload")
+
+    # Signature, flags (int32), header extension length (int32) + extension
+    ext = int.from_bytes(view[15:19], "big")
+    body = view[19 + ext:len(view) - 2]   # trailer: int16 -1
+
+    if len(body) % ROW.itemsize:
+        raise ValueError("Unexpected row layout in COPY payload")
+
+    rows = np.frombuffer(body, dtype=ROW)
+    if len(rows) and not (rows["fields"] == 3).all():
+        raise ValueError("Unexpected field count in COPY payload")
+
+    return {
+        "series_key": rows["series_key"].astype(np.int32),
+        "observation_time": (rows["observation_time"].astype(np.int64) + PG_EPOCH_US).view("datetime64[us]"),
+        "value": rows["value"].astype(np.float64),
+    }
+
+
+def copy_observations(engine, series_ids: list[str], start, end) -> pd.DataFrame:
+    """
+    Long frame (series_id, observation_time, value) of the given series
+    between start and end (inclusive), ordered by series_id and time.
+    """
+    # observation_time is naive UTC; an aware bound would be compared in
+    # the session's TimeZone
+    start, end = _naive_utc(start), _naive_utc(end)
+    buffer = io.BytesIO()
+
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT series_key, series_id FROM meta_series WHERE series_id = ANY(%s)",
+                (list(series_ids),),
+            )
+            series_keys = dict(cur.fetchall())
+
+            sql = cur.mogrify(COPY_SQL, {"series_keys": list(series_keys), "start": start, "end": end})
+            cur.copy_expert(sql.decode(), buffer)
+    finally:
+        conn.close()
+
+    return _long_frame(parse_copy_binary(buffer.getbuffer()), series_keys)
+
+
+async def copy_observations_async(conn, series_ids: list[str], start, end) -> pd.DataFrame:
+    """
+    copy_observations() over an asyncpg connection.
+    """
+    # Bound as TIMESTAMP: asyncpg would read a naive datetime bound to a
+    # timestamptz parameter as host-local time
+    start, end = _naive_utc(start), _naive_utc(end)
+    series_keys = dict(await conn.fetch(
+        "SELECT series_key, series_id FROM meta_series WHERE series_id = ANY($1::text[])",
+        list(series_ids),
+    ))
+
+    payload = bytearray()
+
+    async def write(data: bytes) -> None:
+        payload.extend(data)
+
+    await conn.copy_from_query(
+        ASYNC_SELECT_SQL, list(series_keys), start, end, output=write, format="binary"
+    )
+    return _long_frame(parse_copy_binary(payload), series_keys)
+
+
+def _long_frame(cols: dict[str, np.ndarray], series_keys: dict[int, str]) -> pd.DataFrame:
+    # series_key -> series_id through positions in the sorted key list
+    keys = np.array(sorted(series_keys), dtype=np.int32)
+    ids = np.array([series_keys[k] for k in keys], dtype=object)
+    positions = np.searchsorted(keys, cols["series_key"])
+
+    # Rows arrive ordered by series_key; a stable sort on each series'
+    # rank by id keeps the time order within a series
+    rank = np.argsort(np.argsort(ids, kind="stable"))
+    order = np.argsort(rank[positions], kind="stable")
+
+    return pd.DataFrame({
+        "series_id": ids[positions[order]],
+        "observation_time": cols["observation_time"][order],
+        "value": cols["value"][order],
+    })
@@ -0,0 +1,90 @@
+"""
+HTTP backend for GasClient: reads through the FastAPI service instead of
+connecting to Postgres.
+
+Pages of /v2/data are requested as Arrow IPC (format=arrow) over one
+keep-alive requests.Session and followed with the X-Next-Cursor header.
+Record batches are concatenated without copying and converted to pandas
+once, giving the same long frame as the database backend.
+"""
+import pandas as pd
+import pyarrow as pa
+import requests
+from requests.adapters import HTTPAdapter
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+COLUMNS = ["series_id", "observation_time", "value"]
+
+SCHEMA = pa.schema([
+    pa.field("series_id", pa.string()),
+    pa.field("observation_time", pa.timestamp("us")),
+    pa.field("value", pa.float64()),
+])
+
+
+class HttpBackend:
+    def __init__(
+        self,
+        base_url: str,
+        page_size: int = 100_000,
+        timeout: float = 60,
+        pool_maxsize: int = 10,
+        headers: dict | None = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.page_size = page_size
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _get_table(self, path: str, params: dict) -> tuple[pa.Table, str | None]:
+        response = self.session.get(f"{self.base_url}{path}", params=params, timeout=self.timeout)
+        response.raise_for_status()
+
+        table = pa.ipc.open_stream(response.content).read_all()
+        return table, response.headers.get(NEXT_CURSOR_HEADER)
+
+    def iter_pages(self, series_id: str, start, end, page_size: int | None = None):
+        """
+        Pages (as Arrow tables with SCHEMA) of one series between start and
+        end (inclusive), in time order.
+        """
+        params = {
+            "series_id": series_id,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "format": "arrow",
+            "limit": page_size or self.page_size,
+        }
+
+        while True:
+            table, cursor = self._get_table("/v2/data", params)
+            # Dictionary-encoded ids and UTC timestamps -> the client's naive UTC schema
+            yield table.select(COLUMNS).cast(SCHEMA)
+            if cursor is None:
+                break
+            params["cursor"] = cursor
+
+    def _series_table(self, series_id: str, start, end) -> pa.Table:
+        return pa.concat_tables(self.iter_pages(series_id, start, end))
+
+    def fetch(self, series_ids: list[str], start, end) -> pd.DataFrame:
+        """
+        Long frame (series_id, observation_time, value) between start and
+        end (inclusive), ordered by series_id and time.
+        """
+        tables = [self._series_table(s, start, end) for s in sorted(series_ids)]
+        if not tables:
+            return SCHEMA.empty_table().to_pandas()
+
+        return pa.concat_tables(tables).to_pandas(self_destruct=True)
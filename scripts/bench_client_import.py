@@ -0,0 +1,50 @@
+# scripts/bench_client_import.py
+"""
+Startup cost of the gas_client package, each case in a fresh interpreter:
+
+- interpreter   : python -c pass, for reference
+- import        : import gas_client
+- construct     : import gas_client; gas_client.GasClient(url=...)
+- eager (before): what `import gas_client` used to load up front
+                  (app settings, loguru, SQLAlchemy engines, cold tier)
+
+Run with:  python -m scripts.bench_client_import [--repeat 7]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+
+CASES = {
+    "interpreter": "pass",
+    "import": "import gas_client",
+    "construct": (
+        "import gas_client; "
+        "gas_client.GasClient(url='postgresql+psycopg2://user@localhost/db')"
+    ),
+    "eager (before)": (
+        "import gas_client.client, app.db.connection, app.archive.observations, "
+        "gas_client.cache"
+    ),
+}
+
+
+def run(code: str) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True)
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    run(CASES["eager (before)"])   # warm the filesystem cache
+
+    for name, code in CASES.items():
+        times = [run(code) for _ in range(args.repeat)]
+        print(f"{name:<15} median={statistics.median(times) * 1000:8.1f} ms  "
+              f"min={min(times) * 1000:8.1f} ms")
@@ -0,0 +1,68 @@
+# scripts/bench_client_reads.py
+"""
+Compare gas_client read paths on real data:
+
+- tuples : SQLAlchemy fetchall() + pd.DataFrame(rows) (the old path)
+- copy   : binary COPY into NumPy columns (gas_client.copy_reader)
+
+Reports wall time and peak traced memory of each.
+
+Run with:  python -m scripts.bench_client_reads SERIES_ID [...] --start 2024-01-01 --end 2024-12-31
+"""
+import argparse
+import time
+from datetime import datetime
+import tracemalloc
+
+import pandas as pd
+from sqlalchemy import text
+
+from app.db.connection import engine
+from gas_client.copy_reader import copy_observations
+
+
+def read_tuples(series_ids, start, end) -> pd.DataFrame:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            text("""
+                SELECT m.series_id, d.observation_time, d.value
+                FROM data_observations d
+                JOIN meta_series m ON m.series_key = d.series_key
+                WHERE m.series_id = ANY(:series_ids)
+                  AND d.observation_time BETWEEN :start AND :end
+                ORDER BY m.series_id, d.observation_time
+            """),
+            {"series_ids": series_ids, "start": start, "end": end},
+        ).fetchall()
+    return pd.DataFrame(rows, columns=["series_id", "observation_time", "value"])
+
+
+def read_copy(series_ids, start, end) -> pd.DataFrame:
+    return copy_observations(engine, series_ids, start, end)
+
+
+def measure(fn, *args) -> tuple[float, int, int]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    df = fn(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, len(df)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("series_ids", nargs="+")
+    parser.add_argument("--start", required=True, type=datetime.fromisoformat, help="naive UTC")
+    parser.add_argument("--end", required=True, type=datetime.fromisoformat, help="naive UTC")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    # Warm the pool and the page cache
+    read_copy(args.series_ids, args.start, args.end)
+
+    for name, fn in (("tuples", read_tuples), ("copy", read_copy)):
+        runs = [measure(fn, args.series_ids, args.start, args.end) for _ in range(args.repeat)]
+        elapsed, peak, rows = min(runs)
+        print(f"{name:<7} rows={rows:<10} best={elapsed:8.3f}s  peak={peak / 2**20:8.1f} MiB")
@@ -0,0 +1,109 @@
+# scripts/check_query_plans.py
+"""
+EXPLAIN common /v2/data filter combinations and assert they use index scans.
+
+Picks a real series/dataset and time window from the database, builds each
+query with build_data_query() and fails (exit 1) if any plan reads
+data_observations without an index.
+
+On small development databases the planner prefers sequential scans
+regardless of the query shape; pass --no-seqscan to check that an index
+path exists at all.
+"""
+import argparse
+import json
+import sys
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from app.api.v2.queries import build_data_query
+from app.db.connection import engine
+
+
+INDEX_NODES = {"Index Scan", "Index Only Scan", "Bitmap Heap Scan"}
+
+
+def _walk(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+def _observation_scans(plan) -> list[dict]:
+    """Scan nodes that read a data_observations partition."""
+    return [
+        node for node in _walk(plan)
+        if node.get("Relation Name", "").startswith("data_observations")
+    ]
+
+
+def _sample_filters(conn) -> dict:
+    row = conn.execute(text("""
+        SELECT m.series_id, m.dataset_id, d.observation_time, q.flag
+        FROM data_observations d
+        JOIN meta_series m ON m.series_key = d.series_key
+        LEFT JOIN quality_flags q ON q.flag_id = d.quality_flag_id
+        ORDER BY d.observation_time DESC
+        LIMIT 1
+    """)).fetchone()
+
+    if row is None:
+        sys.exit("data_observations is empty: nothing to explain")
+
+    end = row.observation_time
+    return {
+        "series_id": row.series_id,
+        "dataset_id": row.dataset_id,
+        "start": end - timedelta(days=7),
+        "end": end,
+        "quality_flag": row.flag or "UNKNOWN",
+    }
+
+
+COMBINATIONS = [
+    ("series_id",),
+    ("series_id", "start", "end"),
+    ("series_id", "start"),
+    ("series_id", "start", "end", "quality_flag"),
+    ("dataset_id", "start", "end"),
+    ("series_id", "dataset_id", "start", "end"),
+]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--no-seqscan", action="store_true",
+                        help="disable sequential scans (small dev databases)")
+    args = parser.parse_args()
+
+    failures = 0
+
+    with engine.connect() as conn:
+        sample = _sample_filters(conn)
+
+        if args.no_seqscan:
+            conn.execute(text("SET enable_seqscan = off"))
+
+        for combo in COMBINATIONS:
+            query, params = build_data_query(**{k: sample[k] for k in combo})
+
+            plan = conn.execute(
+                text("EXPLAIN (FORMAT JSON) " + query.text), params
+            ).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+
+            scans = _observation_scans(plan[0]["Plan"])
+            seq = [n["Relation Name"] for n in scans if n["Node Type"] not in INDEX_NODES]
+            ok = bool(scans) and not seq
+
+            print(f"{'OK  ' if ok else 'FAIL'} {'+'.join(combo):<45} "
+                  f"partitions={len(scans)} seq_scans={seq}")
+            failures += not ok
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
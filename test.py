@@ -15,4 +15,8 @@ df_db = pd.read_sql("""
     ORDER BY ingested_at
 """, engine)
 
-pd.DataFrame(list(df_db["raw_payload"])).to_csv("db.csv", index=False)
+from app.archive.raw_events import read_archived_payloads
+
+# Archived (older) payloads first, then hot rows from raw_events
+archived = read_archived_payloads("PUBOB611", newest_first=False)
+pd.DataFrame(archived + list(df_db["raw_payload"])).to_csv("db.csv", index=False)
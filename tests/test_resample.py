@@ -0,0 +1,41 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from app.api.v2 import resample
+from app.api.v2.resample import GAS_DAY
+
+
+# (naive UTC observation time, UTC start of its gas day) around the UK
+# clock changes of 2024: 31 March (23-hour gas day 30 March) and
+# 27 October (25-hour gas day 26 October)
+CLOCK_CHANGE_CASES = [
+    (datetime(2024, 3, 30, 4, 59), datetime(2024, 3, 29, 5)),
+    (datetime(2024, 3, 30, 5, 0), datetime(2024, 3, 30, 5)),
+    (datetime(2024, 3, 31, 3, 59), datetime(2024, 3, 30, 5)),
+    (datetime(2024, 3, 31, 4, 30), datetime(2024, 3, 31, 4)),   # 05:30 BST
+    (datetime(2024, 10, 26, 4, 0), datetime(2024, 10, 26, 4)),
+    (datetime(2024, 10, 27, 4, 30), datetime(2024, 10, 26, 4)),  # 04:30 GMT
+    (datetime(2024, 10, 27, 5, 0), datetime(2024, 10, 27, 5)),
+]
+
+
+def test_gas_day_bucket_starts_across_clock_changes():
+    times = pd.Series([t for t, _ in CLOCK_CHANGE_CASES], dtype="datetime64[us]")
+    starts = resample.bucket_starts(times, GAS_DAY)
+    assert list(starts) == [pd.Timestamp(s) for _, s in CLOCK_CHANGE_CASES]
+
+
+@pytest.mark.parametrize("ts, start", CLOCK_CHANGE_CASES)
+def test_gas_day_boundaries_across_clock_changes(ts, start):
+    assert resample.previous_boundary(ts, GAS_DAY) == start
+    assert resample.next_boundary(start, GAS_DAY) == start
+    assert resample.next_boundary(ts, GAS_DAY) > ts or ts == start
+
+
+def test_gas_day_lengths_on_clock_change_days():
+    spring = resample.gas_day_start(datetime(2024, 3, 31).date()) - resample.gas_day_start(datetime(2024, 3, 30).date())
+    autumn = resample.gas_day_start(datetime(2024, 10, 27).date()) - resample.gas_day_start(datetime(2024, 10, 26).date())
+    assert spring == pd.Timedelta(hours=23)
+    assert autumn == pd.Timedelta(hours=25)
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v2.routes import _parse_time
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-01-01", datetime(2024, 1, 1)),
+    ("2024-01-01T00:00:00", datetime(2024, 1, 1)),
+    ("2024-01-01T00:00:00Z", datetime(2024, 1, 1)),
+    ("2024-01-01T00:30:00z", datetime(2024, 1, 1, 0, 30)),
+    ("2024-07-01T06:00:00+01:00", datetime(2024, 7, 1, 5)),
+])
+def test_parse_time_returns_naive_utc(value, expected):
+    parsed = _parse_time(value)
+    assert parsed == expected
+    assert parsed.tzinfo is None
+
+
+def test_parse_time_none():
+    assert _parse_time(None) is None
+
+
+@pytest.mark.parametrize("value", ["", "yesterday", "2024-13-01", "Z"])
+def test_parse_time_rejects_invalid(value):
+    with pytest.raises(HTTPException) as exc:
+        _parse_time(value)
+    assert exc.value.status_code == 400